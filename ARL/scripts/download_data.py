@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import requests
 
@@ -15,32 +23,205 @@ DATASETS: Dict[str, str] = {
     "owid-co2-data.csv": "https://raw.githubusercontent.com/owid/co2-data/master/owid-co2-data.csv",
 }
 
+# Optional pinned SHA-256 per file; the OWID files are updated in place, so
+# none are pinned by default (a mismatch fails the download)
+EXPECTED_SHA256: Dict[str, str] = {}
+
+CHUNK_SIZE = 1 << 20
+TIMEOUT = 60
+RETRIES = 3
+
+
+@dataclass
+class DownloadResult:
+    filename: str
+    status: str  # "downloaded", "resumed" or "not-modified"
+    size: int
+    sha256: str
+
 
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def download_file(url: str, dest: Path) -> None:
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
-    dest.write_bytes(response.content)
+def _meta_path(path: Path) -> Path:
+    # Validators (ETag, Last-Modified), size and SHA-256 stored next to the file
+    return path.with_name(path.name + ".meta.json")
+
+
+def _read_meta(path: Path) -> Dict:
+    try:
+        return json.loads(_meta_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path: Path, meta: Dict) -> None:
+    _meta_path(path).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _validators(response: requests.Response) -> Dict:
+    return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+
+def _is_current(dest: Path, meta: Dict) -> bool:
+    # The local copy is only trusted for a conditional GET if it still matches
+    # what was recorded when it was downloaded
+    return (dest.exists() and meta.get("sha256") is not None and dest.stat().st_size == meta.get("size")
+            and sha256_file(dest) == meta["sha256"])
+
+
+def download_file(url: str, dest: Path, session: Optional[requests.Session] = None,
+                  expected_sha256: Optional[str] = None, timeout: float = TIMEOUT) -> DownloadResult:
+    """Download url to dest, streaming to dest.part and resuming it if present.
+
+    An unchanged file (304 to If-None-Match / If-Modified-Since) is not
+    downloaded again. An interrupted transfer continues with a Range request
+    guarded by If-Range, so a file changed on the server restarts from zero.
+    The file is requested without content coding, so Content-Length, the bytes
+    on disk and Range offsets all count the same bytes.
+    """
+    session = session or requests.Session()
+    part = dest.with_name(dest.name + ".part")
+    meta = _read_meta(dest)
+
+    # requests asks for gzip by default; Content-Length would then be the
+    # compressed size and Range offsets would not match the decoded .part file
+    headers = {"Accept-Encoding": "identity"}
+    if _is_current(dest, meta):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    part_meta = _read_meta(part)
+    offset = part.stat().st_size if part.exists() else 0
+    validator = part_meta.get("etag") or part_meta.get("last_modified")
+    if offset and validator:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    else:
+        offset = 0
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return DownloadResult(dest.name, "not-modified", meta["size"], meta["sha256"])
+        if response.status_code == 416:
+            # The partial file does not fit the current version: start over
+            part.unlink(missing_ok=True)
+            _meta_path(part).unlink(missing_ok=True)
+            return download_file(url, dest, session, expected_sha256, timeout)
+        response.raise_for_status()
+
+        resumed = response.status_code == 206
+        if not resumed:
+            offset = 0
+        validators = _validators(response)
+        length = response.headers.get("Content-Length")
+        total = offset + int(length) if length is not None else None
+        if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+            # A server that compresses anyway: the decoded size cannot be checked
+            # against Content-Length, and the .part file cannot be resumed by offset
+            total = None
+            _meta_path(part).unlink(missing_ok=True)
+        else:
+            _write_meta(part, validators)
+
+        digest = hashlib.sha256()
+        if resumed:
+            with part.open("rb") as fh:
+                for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                    digest.update(block)
+        with part.open("ab" if resumed else "wb") as fh:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                fh.write(chunk)
+                digest.update(chunk)
+
+    size = part.stat().st_size
+    if total is not None and size != total:
+        raise IOError(f"{dest.name}: incomplete transfer ({size} of {total} bytes)")
+    checksum = digest.hexdigest()
+    if expected_sha256 and checksum != expected_sha256.lower():
+        part.unlink()
+        _meta_path(part).unlink(missing_ok=True)
+        raise ValueError(f"{dest.name}: SHA-256 mismatch (expected {expected_sha256}, got {checksum})")
+
+    os.replace(part, dest)
+    _meta_path(part).unlink(missing_ok=True)
+    _write_meta(dest, {"url": url, **validators, "size": size, "sha256": checksum})
+    return DownloadResult(dest.name, "resumed" if resumed else "downloaded", size, checksum)
+
+
+def download_with_retries(url: str, dest: Path, retries: int = RETRIES, **kwargs) -> DownloadResult:
+    # Network errors and 5xx are retried with backoff; each retry resumes from the
+    # bytes already on disk. Client errors (404, ...) and checksum mismatches fail.
+    with requests.Session() as session:
+        for attempt in range(retries):
+            try:
+                return download_file(url, dest, session=session, **kwargs)
+            except (requests.RequestException, OSError) as exc:
+                status = getattr(getattr(exc, "response", None), "status_code", None)
+                if status is not None and status < 500:
+                    raise
+                print(f"Retrying {url} ({exc})", file=sys.stderr)
+                time.sleep(2 ** attempt)
+        return download_file(url, dest, session=session, **kwargs)
+
+
+def download_all(datasets: Dict[str, str], data_dir: Path, workers: Optional[int] = None,
+                 retries: int = RETRIES) -> Dict[str, object]:
+    # Files are fetched concurrently; the result per file is a DownloadResult or
+    # the exception that made it fail
+    ensure_dir(data_dir)
+    results: Dict[str, object] = {}
+    with ThreadPoolExecutor(max_workers=workers or len(datasets) or 1) as pool:
+        futures = {
+            name: pool.submit(download_with_retries, url, data_dir / name, retries=retries,
+                              expected_sha256=EXPECTED_SHA256.get(name))
+            for name, url in datasets.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                results[name] = exc
+    return results
 
 
 def main() -> int:
-    ensure_dir(DATA_DIR)
-    for filename, url in DATASETS.items():
-        dest_path = DATA_DIR / filename
-        print(f"Downloading {url} -> {dest_path}")
-        try:
-            download_file(url, dest_path)
-        except Exception as exc:  # noqa: BLE001
-            print(f"Failed to download {url}: {exc}", file=sys.stderr)
-            return 1
+    parser = argparse.ArgumentParser(description="Download the OWID datasets (resumable, conditional, parallel)")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--base-url", help="fetch every file from BASE_URL/<filename> instead (e.g. a local mirror)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    args = parser.parse_args()
+
+    datasets = DATASETS
+    if args.base_url:
+        datasets = {name: f"{args.base_url.rstrip('/')}/{name}" for name in DATASETS}
+    for filename, url in datasets.items():
+        print(f"Downloading {url} -> {args.data_dir / filename}")
+    results = download_all(datasets, args.data_dir, workers=args.workers, retries=args.retries)
+
+    failed = False
+    for filename, result in results.items():
+        if isinstance(result, DownloadResult):
+            print(f"{filename}: {result.status} ({result.size:,} bytes, sha256 {result.sha256[:12]})")
+        else:
+            print(f"Failed to download {datasets[filename]}: {result}", file=sys.stderr)
+            failed = True
+    if failed:
+        return 1
     print("All datasets downloaded.")
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
-
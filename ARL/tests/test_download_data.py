@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import download_data
+from download_data import download_file
+
+PAYLOAD = b"country,year,value\n" + b"".join(f"C{i % 50},{1900 + i % 120},{i * 0.5}\n".encode() for i in range(20000))
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # A file server like raw.githubusercontent.com: ETag, 304, Range / If-Range,
+    # and gzip content coding whenever the client accepts it
+    protocol_version = "HTTP/1.1"
+    truncate_next = False
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body, status, start = PAYLOAD, 200, 0
+        byte_range = self.headers.get("Range")
+        if byte_range and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(byte_range.split("=")[1].rstrip("-"))
+            body, status = PAYLOAD[start:], 206
+        encoding = None
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body, encoding = gzip.compress(body), "gzip"
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if type(self).truncate_next:
+            type(self).truncate_next = False
+            self.wfile.write(body[:len(body) // 3])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.requests, _Handler.truncate_next = [], False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/data.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_from_gzip_capable_server(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    result = download_file(server, dest)
+    assert result.status == "downloaded"
+    assert dest.read_bytes() == PAYLOAD
+    assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    assert _Handler.requests[0]["Accept-Encoding"] == "identity"
+
+
+def test_interrupted_download_resumes(server, tmp_path, monkeypatch):
+    # Small chunks, so part of the body reaches the .part file before the cut
+    monkeypatch.setattr(download_data, "CHUNK_SIZE", 16 * 1024)
+    dest = tmp_path / "data.csv"
+    _Handler.truncate_next = True
+    with pytest.raises(Exception):
+        download_file(server, dest)
+    partial = (tmp_path / "data.csv.part").stat().st_size
+    assert 0 < partial < len(PAYLOAD)
+
+    result = download_file(server, dest)
+    assert result.status == "resumed"
+    assert _Handler.requests[-1]["Range"] == f"bytes={partial}-"
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_unchanged_file_is_not_downloaded_again(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    first = download_file(server, dest)
+    second = download_file(server, dest)
+    assert second.status == "not-modified"
+    assert (second.size, second.sha256) == (first.size, first.sha256)
+
+
+def test_checksum_mismatch_keeps_nothing(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    with pytest.raises(ValueError):
+        download_file(server, dest, expected_sha256="0" * 64)
+    assert list(tmp_path.iterdir()) == []
@@ -1,42 +1,75 @@
+import os
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from price_history import HISTORY_DB, PriceHistory
+from telemetry import METRICS_DB, ScrapeTelemetry
+
 plt.style.use('seaborn-v0_8')
 sns.set_palette('Set2')
 np.random.seed(42)
 
-# Simulated dataset reflecting Asseco experience
+# Simulated dataset reflecting Asseco experience (used where no measured data exists)
 num_sites = 55
 sites = [f"site_{i:02d}" for i in range(1, num_sites+1)]
 categories = ['Electronics', 'Fashion', 'Home', 'Sports', 'Books']
 
-# Web scraping coverage across sites
-coverage = pd.DataFrame({
-    'site': sites,
-    'category': np.random.choice(categories, size=num_sites, p=[0.3, 0.25, 0.2, 0.15, 0.1]),
-    'products_scraped': np.random.randint(800, 5000, size=num_sites),
-    'success_rate': np.clip(np.random.normal(0.92, 0.05, size=num_sites), 0.6, 0.99),
-    'avg_response_ms': np.random.normal(850, 150, size=num_sites).astype(int)
-})
+# Web scraping coverage across sites: measured latency / success rate from the
+# scraper's telemetry log when it exists, otherwise simulated
+coverage = pd.DataFrame()
+latency_hist = pd.DataFrame()
+if os.path.exists(METRICS_DB):
+    telemetry = ScrapeTelemetry(METRICS_DB)
+    measured = telemetry.site_stats()
+    latency_hist = telemetry.latency_histograms()
+    telemetry.close()
+    if not measured.empty:
+        products = pd.DataFrame(columns=['site', 'category', 'products_scraped'])
+        if os.path.exists(HISTORY_DB):
+            history = PriceHistory(HISTORY_DB)
+            products = history.site_coverage().drop_duplicates('site')
+            history.close()
+        coverage = measured.merge(products, on='site', how='left').fillna({'category': 'Unknown',
+                                                                           'products_scraped': 0})
+        coverage = coverage[['site', 'category', 'products_scraped', 'success_rate', 'avg_response_ms',
+                             'p95_ms', 'p99_ms']]
+if coverage.empty:
+    coverage = pd.DataFrame({
+        'site': sites,
+        'category': np.random.choice(categories, size=num_sites, p=[0.3, 0.25, 0.2, 0.15, 0.1]),
+        'products_scraped': np.random.randint(800, 5000, size=num_sites),
+        'success_rate': np.clip(np.random.normal(0.92, 0.05, size=num_sites), 0.6, 0.99),
+        'avg_response_ms': np.random.normal(850, 150, size=num_sites).astype(int)
+    })
 coverage['fail_rate'] = 1 - coverage['success_rate']
 
-# Price change time series for a sample of products
-days = pd.date_range('2020-01-01', periods=90, freq='D')
-products = [f"P{i:04d}" for i in range(1, 31)]
-
-price_data = []
-for p in products:
-    base = np.random.uniform(20, 200)
-    noise = np.random.normal(0, 1.2, size=len(days))
-    trend = np.linspace(0, np.random.uniform(-5, 5), len(days))
-    series = np.maximum(5, base + trend + noise.cumsum()*0.1)
-    promo_days = np.random.choice(range(len(days)), size=5, replace=False)
-    series[promo_days] *= np.random.uniform(0.85, 0.95)
-    for d, price in zip(days, series):
-        price_data.append({'date': d, 'product': p, 'price': price})
-prices = pd.DataFrame(price_data)
+# Price change time series: measured history from the scraping pipeline when
+# available, otherwise a simulated sample of products
+prices = pd.DataFrame()
+if os.path.exists(HISTORY_DB):
+    history = PriceHistory(HISTORY_DB)
+    prices = history.daily_prices(days=90)
+    history.close()
+    price_source = 'Scraped History'
+if prices.empty:
+    days = pd.date_range('2020-01-01', periods=90, freq='D')
+    products = [f"P{i:04d}" for i in range(1, 31)]
+
+    price_data = []
+    for p in products:
+        base = np.random.uniform(20, 200)
+        noise = np.random.normal(0, 1.2, size=len(days))
+        trend = np.linspace(0, np.random.uniform(-5, 5), len(days))
+        series = np.maximum(5, base + trend + noise.cumsum()*0.1)
+        promo_days = np.random.choice(range(len(days)), size=5, replace=False)
+        series[promo_days] *= np.random.uniform(0.85, 0.95)
+        for d, price in zip(days, series):
+            price_data.append({'date': d, 'product': p, 'price': price})
+    prices = pd.DataFrame(price_data)
+    price_source = 'Simulated'
 
 # ETL / Excel automation KPIs (weekly)
 weeks = pd.date_range('2020-01-06', periods=12, freq='W-MON')
@@ -77,7 +110,8 @@ price_index = prices.groupby('date')['price'].mean()
 base = price_index.iloc[0]
 idx = (price_index / base) * 100
 plt.plot(idx.index, idx.values, color='#FF6B6B', linewidth=2.5)
-plt.title('Price Index Trend (Average of 30 SKUs)', fontsize=14, fontweight='bold')
+n_skus = prices.groupby(['site', 'product']).ngroups if 'site' in prices.columns else prices['product'].nunique()
+plt.title(f'Price Index Trend (Average of {n_skus} SKUs, {price_source})', fontsize=14, fontweight='bold')
 plt.xlabel('Date')
 plt.ylabel('Index (base=100)')
 plt.xticks(rotation=45)
@@ -108,6 +142,23 @@ plt.tight_layout()
 plt.savefig('asseco_success_distribution.png', dpi=300, bbox_inches='tight')
 plt.show()
 
+# Measured server latency per site (telemetry log only; nothing is simulated here)
+if not latency_hist.empty:
+    shares = latency_hist.div(latency_hist.sum(axis=1), axis=0) * 100
+    shares.columns = [f'<{c.right:g} ms' if c.left == 0 else (f'≥{c.left:g} ms' if np.isinf(c.right)
+                      else f'{c.left:g}–{c.right:g} ms') for c in shares.columns]
+    shares = shares.loc[:, latency_hist.sum(axis=0).to_numpy() > 0]
+    ax = shares.plot(kind='barh', stacked=True, figsize=(12, max(4, 0.4 * len(shares) + 2)), colormap='viridis')
+    ax.set_title('Server Latency Distribution per Site (Scrape Telemetry)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Share of Requests (%)')
+    ax.set_ylabel('Site')
+    ax.legend(title='Latency', bbox_to_anchor=(1.01, 1), loc='upper left')
+    plt.tight_layout()
+    plt.savefig('asseco_latency_histogram.png', dpi=300, bbox_inches='tight')
+    plt.show()
+
 print('✅ Asseco visualizations created:')
 print(' - asseco_overview.png')
 print(' - asseco_success_distribution.png')
+if not latency_hist.empty:
+    print(' - asseco_latency_histogram.png')
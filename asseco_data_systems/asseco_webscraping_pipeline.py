@@ -1,3 +1,4 @@
+import argparse
 import os
 import time
 from datetime import datetime
@@ -8,6 +9,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from excel_export import write_excel_streaming
+from kpi_engine import KpiState
+from price_history import HISTORY_DB, PriceHistory
+from telemetry import METRICS_DB
+
 # Optional deps for scraping
 try:
     import requests
@@ -21,6 +27,7 @@ sns.set_palette('Set2')
 
 OUTPUT_EXCEL = 'asseco_scraped_data.xlsx'
 KPI_FIG = 'asseco_scrape_kpis.png'
+HTTP_CACHE_DIR = '.http_cache'
 
 # Target demo sites (public demo). If network blocked, we fallback to synthetic data.
 SITES: List[Dict[str, str]] = [
@@ -37,29 +44,39 @@ SITES: List[Dict[str, str]] = [
 ]
 
 
+def books_page_url(base_url: str, page: int) -> str:
+    return base_url if page == 1 else f"{base_url}catalogue/page-{page}.html"
+
+
+def parse_books_page(html: str, site: str = 'books_demo') -> List[Dict]:
+    rows = []
+    soup = BeautifulSoup(html, 'html.parser')
+    for article in soup.select('article.product_pod'):
+        title = article.h3.a.get('title', '').strip()
+        price_raw = article.select_one('.price_color').get_text(strip=True)
+        price = float(price_raw.replace('£', '').strip())
+        availability = article.select_one('.availability').get_text(strip=True)
+        rating_cls = article.select_one('.star-rating')
+        rating = rating_cls['class'][1] if rating_cls and len(rating_cls['class']) > 1 else 'NA'
+        rows.append({
+            'site': site,
+            'product': title,
+            'price': price,
+            'availability': availability,
+            'rating_label': rating,
+            'category': 'Books'
+        })
+    return rows
+
+
 def scrape_books_toscrape(base_url: str, limit_pages: int = 3) -> pd.DataFrame:
     rows = []
     for page in range(1, limit_pages + 1):
-        url = base_url if page == 1 else f"{base_url}catalogue/page-{page}.html"
+        url = books_page_url(base_url, page)
         try:
             resp = requests.get(url, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            for article in soup.select('article.product_pod'):
-                title = article.h3.a.get('title', '').strip()
-                price_raw = article.select_one('.price_color').get_text(strip=True)
-                price = float(price_raw.replace('£', '').strip())
-                availability = article.select_one('.availability').get_text(strip=True)
-                rating_cls = article.select_one('.star-rating')
-                rating = rating_cls['class'][1] if rating_cls and len(rating_cls['class']) > 1 else 'NA'
-                rows.append({
-                    'site': 'books_demo',
-                    'product': title,
-                    'price': price,
-                    'availability': availability,
-                    'rating_label': rating,
-                    'category': 'Books'
-                })
+            rows.extend(parse_books_page(resp.text))
         except Exception:
             # Network issue → break and return what we have
             break
@@ -77,46 +94,60 @@ def synthetic_site(site: str, category: str, num: int = 120) -> pd.DataFrame:
         'price': prices,
         'availability': availability,
         'rating_label': ratings.astype(str),
-        'category': category
+        'category': category,
+        'synthetic': True  # kept out of the price history
     })
     return df
 
 
-def run_scrape() -> pd.DataFrame:
+def run_scrape(use_async: bool = True, crawl_workers: int = 0) -> pd.DataFrame:
     all_rows = []
     ts = datetime.utcnow().replace(microsecond=0).isoformat() + 'Z'
+    scraped = None
+    if HAVE_NET_DEPS and crawl_workers > 0:
+        # Full crawl: every listing page, found by following pagination, shared by worker processes
+        from crawl_frontier import crawl
+        df_all = crawl(SITES, workers=crawl_workers)
+        scraped = dict(tuple(df_all.groupby('site', sort=False))) if not df_all.empty else {}
+    elif HAVE_NET_DEPS and use_async:
+        # Concurrent engine (per-host limits + token bucket instead of fixed sleeps) when aiohttp is available
+        try:
+            from async_scraper import scrape_sites_async
+        except ImportError:
+            pass
+        else:
+            df_all = scrape_sites_async(SITES, cache_dir=HTTP_CACHE_DIR, metrics_db=METRICS_DB)
+            scraped = dict(tuple(df_all.groupby('site', sort=False))) if not df_all.empty else {}
     for s in SITES:
         if s['type'] == 'books' and HAVE_NET_DEPS:
-            df = scrape_books_toscrape(s['url'])
+            if scraped is not None:
+                df = scraped.get(s['site'], pd.DataFrame()).reset_index(drop=True)
+            else:
+                df = scrape_books_toscrape(s['url'])
+                # Be polite if we had network
+                time.sleep(0.5)
+            df = df.assign(synthetic=False)
             if df.empty:
                 df = synthetic_site(s['site'], 'Books')
         else:
             df = synthetic_site(s['site'], s['type'].capitalize())
         df['scrape_timestamp'] = ts
         all_rows.append(df)
-        # Be polite if we had network
-        time.sleep(0.5)
     return pd.concat(all_rows, ignore_index=True)
 
 
 def compute_kpis(df: pd.DataFrame) -> pd.DataFrame:
-    df['in_stock'] = (df['availability'].str.contains('In stock', case=False, na=False)).astype(int)
-    kpis = df.groupby('site').agg(
-        products=('product', 'count'),
-        avg_price=('price', 'mean'),
-        median_price=('price', 'median'),
-        in_stock_rate=('in_stock', 'mean')
-    ).reset_index()
-    kpis['in_stock_rate'] = (kpis['in_stock_rate'] * 100).round(1)
-    kpis['avg_price'] = kpis['avg_price'].round(2)
-    kpis['median_price'] = kpis['median_price'].round(2)
-    return kpis
+    # Counts, averages and stock rates from the per-site state (see kpi_engine). A
+    # one-shot snapshot has every price at hand, so its median is the exact one, not
+    # the sketch estimate that incremental/live updates use.
+    kpis = KpiState().update(df).kpis()
+    medians = df.groupby('site')['price'].median().round(2)
+    return kpis.assign(median_price=kpis['site'].map(medians))
 
 
 def save_to_excel(df: pd.DataFrame, kpis: pd.DataFrame, out_path: str) -> None:
-    with pd.ExcelWriter(out_path, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='raw')
-        kpis.to_excel(writer, index=False, sheet_name='kpi')
+    # Streaming write-only workbook; very large raw tables spill to a Parquet/CSV sidecar
+    write_excel_streaming({'raw': df, 'kpi': kpis}, out_path)
 
 
 def plot_kpis(kpis: pd.DataFrame, df: pd.DataFrame, out_png: str) -> None:
@@ -166,12 +197,24 @@ def plot_kpis(kpis: pd.DataFrame, df: pd.DataFrame, out_png: str) -> None:
 
 
 def main() -> None:
-    df = run_scrape()
+    parser = argparse.ArgumentParser(description='Scrape product pages, update the price history and plot KPIs')
+    parser.add_argument('--excel', action='store_true', help=f'also export this run to {OUTPUT_EXCEL}')
+    parser.add_argument('--crawl', type=int, default=0, metavar='WORKERS',
+                        help='crawl all listing pages through the shared frontier with this many processes')
+    args = parser.parse_args()
+
+    df = run_scrape(crawl_workers=args.crawl)
     kpis = compute_kpis(df)
-    save_to_excel(df, kpis, OUTPUT_EXCEL)
+    history = PriceHistory(HISTORY_DB)
+    changed = history.record(df)
+    history.close()
+    if args.excel:
+        save_to_excel(df, kpis, OUTPUT_EXCEL)
     plot_kpis(kpis, df, KPI_FIG)
     print('✅ Pipeline completed:')
-    print(f' - Excel: {OUTPUT_EXCEL}')
+    print(f' - Price history: {HISTORY_DB} ({changed:,} new observations)')
+    if args.excel:
+        print(f' - Excel: {OUTPUT_EXCEL}')
     print(f' - KPIs figure: {KPI_FIG}')
     print(f' - Rows scraped: {len(df):,}')
 
@@ -0,0 +1,212 @@
+import asyncio
+import contextlib
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import pandas as pd
+
+from asseco_webscraping_pipeline import books_page_url
+from extractors import get_extractor
+from http_cache import HttpCache, product_block_hash
+from telemetry import ScrapeTelemetry, suggest_host_rates
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = 'asseco-price-monitor/1.0 (+demo)'
+PARSE_POOL_MIN_PAGES = 16  # smaller crawls parse in a thread: starting processes would cost more
+
+
+class TokenBucket:
+    # Politeness limiter: `rate` requests/second on average with bursts of up
+    # to `burst`. Used from a single event loop, so no locking is needed.
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class FetchResult:
+    site: str
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    bytes: int = 0
+    elapsed_s: float = 0.0   # whole fetch: waits, every attempt and backoff sleeps
+    latency_s: float = 0.0   # HTTP exchange of the last attempt only (server latency)
+    wait_s: float = 0.0      # time spent in the host slot queue and the token bucket
+    backoff_s: float = 0.0   # sleeps between retries
+    retries: int = 0
+    parse_s: float = 0.0
+    error: Optional[str] = None
+    cache: Optional[str] = None  # 'not-modified' (304), 'unchanged' (same product block), 'miss'
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and 200 <= self.status < 300 and self.text is not None
+
+
+# (site, url, parser) – parser must be a top-level function so it can run in the process pool
+Job = Tuple[str, str, Callable[[str, str], List[Dict]]]
+
+
+class AsyncScraper:
+    def __init__(self, rate_per_host: float = 2.0, burst: int = 4, per_host: int = 4, total: int = 64,
+                 retries: int = 3, backoff_s: float = 0.5, timeout_s: float = 10.0,
+                 parse_workers: Optional[int] = None, cache: Optional[HttpCache] = None,
+                 host_rates: Optional[Dict[str, float]] = None):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.per_host = per_host
+        self.total = total
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        self.parse_workers = parse_workers
+        self.cache = cache
+        # Per-host overrides of rate_per_host, e.g. telemetry.suggest_host_rates() for slow sites
+        self.host_rates = host_rates or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _host(self, url: str) -> str:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rates.get(host, self.rate_per_host), self.burst)
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return host
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 60.0)
+        return self.backoff_s * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    async def fetch(self, session: aiohttp.ClientSession, site: str, url: str,
+                    headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        host = self._host(url)
+        result = FetchResult(site=site, url=url)
+        t0 = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            result.retries = attempt
+            retry_after = None
+            t_wait = time.perf_counter()
+            async with self._host_slots[host]:
+                await self._buckets[host].acquire()
+                t_request = time.perf_counter()
+                result.wait_s += t_request - t_wait
+                try:
+                    async with session.get(url, headers=headers) as resp:
+                        body = await resp.read()
+                        result.latency_s = time.perf_counter() - t_request
+                        result.status = resp.status
+                        result.headers = dict(resp.headers)
+                        result.bytes = len(body)
+                        result.error = None
+                        if resp.status not in RETRY_STATUSES:
+                            if resp.status < 400:
+                                result.text = body.decode(resp.charset or 'utf-8', errors='replace')
+                            break
+                        retry_after = resp.headers.get('Retry-After')
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    result.latency_s = time.perf_counter() - t_request
+                    result.error = f'{type(exc).__name__}: {exc}'
+            if attempt < self.retries:
+                delay = self._backoff(attempt, retry_after)
+                result.backoff_s += delay
+                await asyncio.sleep(delay)
+        result.elapsed_s = time.perf_counter() - t0
+        return result
+
+    def session(self) -> aiohttp.ClientSession:
+        # One pooled, keep-alive session per crawl
+        connector = aiohttp.TCPConnector(limit=self.total, limit_per_host=self.per_host,
+                                         keepalive_timeout=30, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout,
+                                     headers={'User-Agent': USER_AGENT})
+
+    async def crawl(self, jobs: List[Job]) -> Tuple[List[Dict], List[FetchResult]]:
+        loop = asyncio.get_running_loop()
+        # Limiters are bound to the running loop, so each crawl starts fresh
+        self._buckets, self._host_slots = {}, {}
+        use_pool = len(jobs) >= PARSE_POOL_MIN_PAGES
+        with ProcessPoolExecutor(max_workers=self.parse_workers) if use_pool else contextlib.nullcontext() as pool:
+            async with self.session() as session:
+                async def one(site: str, url: str, parser) -> Tuple[FetchResult, List[Dict]]:
+                    cache = self.cache
+                    key = cache.key(url, parser.__name__) if cache else None
+                    res = await self.fetch(session, site, url, cache.conditional_headers(key) if cache else None)
+                    if cache and res.status == 304:
+                        rows = cache.rows(key)
+                        if rows is not None:
+                            cache.touch(key, res.headers)
+                            res.cache = 'not-modified'
+                            return res, rows
+                        # Entry evicted between the request and the reply: fetch unconditionally
+                        res = await self.fetch(session, site, url)
+                    if not res.ok:
+                        return res, []
+                    if cache:
+                        block_hash = product_block_hash(res.text)
+                        rows = cache.rows_if_unchanged(key, block_hash)
+                        if rows is not None:
+                            cache.touch(key, res.headers)
+                            res.cache, res.text = 'unchanged', None
+                            return res, rows
+                    # CPU-bound HTML parsing runs off the event loop (pool None: default thread pool)
+                    t0 = time.perf_counter()
+                    rows = await loop.run_in_executor(pool, parser, res.text, site)
+                    res.parse_s = time.perf_counter() - t0
+                    if cache:
+                        cache.store(key, url, res.headers, block_hash, rows)
+                        res.cache = 'miss'
+                    res.text = None
+                    return res, rows
+
+                done = await asyncio.gather(*(one(*job) for job in jobs))
+        # Rows come back in job (site, page) order regardless of completion order
+        return [row for _, rows in done for row in rows], [res for res, _ in done]
+
+    def run(self, jobs: List[Job]) -> Tuple[List[Dict], List[FetchResult]]:
+        return asyncio.run(self.crawl(jobs))
+
+
+def books_jobs(sites: List[Dict[str, str]], limit_pages: int = 3, extractor: str = 'auto') -> List[Job]:
+    parser = get_extractor(extractor)
+    return [(s['site'], books_page_url(s['url'], page), parser)
+            for s in sites if s['type'] == 'books' for page in range(1, limit_pages + 1)]
+
+
+def scrape_sites_async(sites: List[Dict[str, str]], limit_pages: int = 3, cache_dir: Optional[str] = None,
+                       extractor: str = 'auto', metrics_db: Optional[str] = None, **engine_kw) -> pd.DataFrame:
+    cache = HttpCache(cache_dir) if cache_dir else None
+    telemetry = ScrapeTelemetry(metrics_db) if metrics_db else None
+    try:
+        if telemetry and 'host_rates' not in engine_kw:
+            # Throttle hosts that were slow or failing over the last week
+            base_rate = engine_kw.get('rate_per_host', 2.0)
+            engine_kw['host_rates'] = suggest_host_rates(telemetry.site_stats(days=7), base_rate)
+        rows, results = AsyncScraper(cache=cache, **engine_kw).run(books_jobs(sites, limit_pages, extractor))
+        if telemetry:
+            telemetry.record(results)
+    finally:
+        if cache:
+            cache.close()
+        if telemetry:
+            telemetry.close()
+    return pd.DataFrame(rows)
@@ -0,0 +1,339 @@
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+import pandas as pd
+
+from extractors import get_extractor
+from kpi_engine import KpiState
+
+try:
+    import requests
+    HAVE_REQUESTS = True
+except Exception:
+    HAVE_REQUESTS = False
+
+FRONTIER_DB = 'asseco_frontier.sqlite'
+USER_AGENT = 'asseco-price-monitor/1.0 (+demo)'
+# Site types with a page extractor; other types are left to the synthetic fallback
+PARSEABLE_TYPES = {'books'}
+LEASE_S = 120.0
+MAX_ATTEMPTS = 3
+
+# Pagination links: <li class="next"><a href="...">, or any <a rel="next" href="...">
+NEXT_LINK = re.compile(
+    r'<li[^>]*class="[^"]*\bnext\b[^"]*"[^>]*>\s*<a[^>]*href="([^"]+)"'
+    r'|<a[^>]*rel="next"[^>]*href="([^"]+)"'
+    r'|<a[^>]*href="([^"]+)"[^>]*rel="next"', re.I)
+
+
+def normalize_url(url: str) -> str:
+    # Lower-case scheme/host, drop fragments and default ports, '' path -> '/'
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    if parts.port and (parts.scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((parts.scheme.lower(), host.lower(), parts.path or '/', parts.query, ''))
+
+
+def fingerprint(url: str) -> int:
+    # 64-bit URL fingerprint; the frontier's primary key, so a URL is queued at most once
+    digest = hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def discover_pagination(html: str, page_url: str) -> List[str]:
+    # Absolute next-page URLs on the same host as the page they were found on
+    host = urlsplit(page_url).netloc
+    links = []
+    for groups in NEXT_LINK.findall(html):
+        href = next(g for g in groups if g)
+        url = urljoin(page_url, href)
+        if urlsplit(url).netloc == host:
+            links.append(url)
+    return links
+
+
+class Frontier:
+    # Persistent crawl frontier shared by worker processes through one SQLite file
+    # (WAL mode). URLs are keyed by fingerprint, leased in priority order from hosts
+    # whose politeness delay has elapsed, and returned to the queue when a lease
+    # expires (crashed worker) or a fetch fails with attempts left.
+    def __init__(self, path: str = FRONTIER_DB, lease_s: float = LEASE_S):
+        self.path = path
+        self.lease_s = lease_s
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                fp INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                site TEXT NOT NULL,
+                host TEXT NOT NULL,
+                priority REAL NOT NULL,
+                depth INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                added_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS urls_ready ON urls (state, host, priority DESC, added_at);
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                delay_s REAL NOT NULL,
+                next_at REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                fp INTEGER NOT NULL UNIQUE,
+                site TEXT NOT NULL,
+                rows TEXT NOT NULL
+            );
+        ''')
+        if 'seq' not in [c[1] for c in self.db.execute('PRAGMA table_info(results)')]:
+            # Frontiers written before results were numbered: rebuild the table with a
+            # seq column (existing rows keep their order among themselves, before any new ones)
+            with self._transaction():
+                self.db.execute('ALTER TABLE results RENAME TO results_old')
+                self.db.execute('CREATE TABLE results (seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                'fp INTEGER NOT NULL UNIQUE, site TEXT NOT NULL, rows TEXT NOT NULL)')
+                self.db.execute('INSERT INTO results (fp, site, rows) SELECT fp, site, rows FROM results_old '
+                                'ORDER BY rowid')
+                self.db.execute('DROP TABLE results_old')
+        # Fingerprints this process already submitted; saves a write for the
+        # pagination links that every page of a listing repeats
+        self._seen: Set[int] = set()
+
+    def add(self, urls: Iterable[Tuple[str, str]], priority: float = 0.0, depth: int = 0,
+            delay_s: float = 0.5) -> int:
+        # (site, url) pairs; returns how many were new to the frontier
+        now = time.time()
+        rows, hosts = [], set()
+        for site, url in urls:
+            fp = fingerprint(url)
+            if fp in self._seen:
+                continue
+            self._seen.add(fp)
+            host = urlsplit(url).netloc
+            hosts.add(host)
+            rows.append((fp, normalize_url(url), site, host, priority, depth, now))
+        if not rows:
+            return 0
+        with self._transaction():
+            self.db.executemany('INSERT OR IGNORE INTO hosts (host, delay_s) VALUES (?, ?)',
+                                [(h, delay_s) for h in hosts])
+            before = self.db.total_changes
+            self.db.executemany('INSERT OR IGNORE INTO urls (fp, url, site, host, priority, depth, added_at) '
+                                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            return self.db.total_changes - before
+
+    def lease(self) -> Optional[Tuple[int, str, str, int]]:
+        # Next (fp, url, site, depth) from a host that is ready, or None
+        now = time.time()
+        with self._transaction():
+            row = self.db.execute('''
+                SELECT u.fp, u.url, u.site, u.depth, u.host
+                  FROM urls u JOIN hosts h ON h.host = u.host
+                 WHERE h.next_at <= ?
+                   AND (u.state = 'queued' OR (u.state = 'leased' AND u.lease_until < ?))
+                 ORDER BY u.priority DESC, u.added_at
+                 LIMIT 1''', (now, now)).fetchone()
+            if row is None:
+                return None
+            fp, url, site, depth, host = row
+            self.db.execute("UPDATE urls SET state = 'leased', lease_until = ?, attempts = attempts + 1 "
+                            'WHERE fp = ?', (now + self.lease_s, fp))
+            self.db.execute('UPDATE hosts SET next_at = ? + delay_s WHERE host = ?', (now, host))
+        return fp, url, site, depth
+
+    def complete(self, fp: int, site: str, rows: List[Dict]) -> None:
+        with self._transaction():
+            self.db.execute("UPDATE urls SET state = 'done', lease_until = NULL WHERE fp = ?", (fp,))
+            # A page re-fetched after its lease expired keeps the rows recorded first
+            self.db.execute('INSERT OR IGNORE INTO results (fp, site, rows) VALUES (?, ?, ?)',
+                            (fp, site, json.dumps(rows)))
+
+    def fail(self, fp: int, max_attempts: int = MAX_ATTEMPTS) -> None:
+        self.db.execute("UPDATE urls SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                        'lease_until = NULL WHERE fp = ?', (max_attempts, fp))
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE state IN ('queued', 'leased')").fetchone()[0]
+
+    def next_ready_in(self) -> float:
+        # Seconds until some host with queued work may be fetched again
+        row = self.db.execute('''
+            SELECT MIN(h.next_at) FROM hosts h
+             WHERE EXISTS (SELECT 1 FROM urls u WHERE u.host = h.host AND u.state IN ('queued', 'leased'))
+        ''').fetchone()
+        return max(0.0, (row[0] or 0) - time.time())
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.db.execute('SELECT state, COUNT(*) FROM urls GROUP BY state').fetchall())
+
+    def results(self) -> pd.DataFrame:
+        query = 'SELECT r.rows FROM results r JOIN urls u ON u.fp = r.fp ORDER BY r.site, u.depth, u.url'
+        rows = [row for (payload,) in self.db.execute(query) for row in json.loads(payload)]
+        return pd.DataFrame(rows)
+
+    def results_since(self, seq: int = 0) -> Tuple[pd.DataFrame, int]:
+        # Rows of pages completed after `seq`, and the seq to pass next time
+        batch = self.db.execute('SELECT seq, rows FROM results WHERE seq > ? ORDER BY seq', (seq,)).fetchall()
+        if not batch:
+            return pd.DataFrame(), seq
+        return pd.DataFrame([row for _, payload in batch for row in json.loads(payload)]), batch[-1][0]
+
+    def close(self) -> None:
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't lease the same URL
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+
+def seed(frontier: Frontier, sites: List[Dict[str, str]], delay_s: float = 0.5) -> int:
+    added = 0
+    for s in sites:
+        if s['type'] in PARSEABLE_TYPES:
+            added += frontier.add([(s['site'], s['url'])], priority=1.0, delay_s=s.get('delay_s', delay_s))
+    return added
+
+
+def _fetch(session, url: str, timeout_s: float) -> str:
+    resp = session.get(url, timeout=timeout_s)
+    resp.raise_for_status()
+    # Pages served without a charset are UTF-8 here, not requests' latin-1 default
+    charset = resp.encoding if 'charset' in resp.headers.get('Content-Type', '').lower() else 'utf-8'
+    return resp.content.decode(charset, errors='replace')
+
+
+def worker(path: str, extractor: str = 'auto', max_pages: Optional[int] = None, timeout_s: float = 10.0,
+           idle_s: float = 0.05) -> int:
+    # Lease → fetch → parse → enqueue discovered pages, until the frontier is drained
+    frontier = Frontier(path)
+    parse = get_extractor(extractor)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    done = 0
+    try:
+        while True:
+            job = frontier.lease()
+            if job is None:
+                if frontier.pending() == 0:
+                    break
+                time.sleep(max(idle_s, min(frontier.next_ready_in(), 1.0)))
+                continue
+            fp, url, site, depth = job
+            try:
+                html = _fetch(session, url, timeout_s)
+                rows = parse(html, site)
+            except Exception:
+                # A fetch or extractor error hands the URL back (or marks it failed)
+                # instead of killing the worker with the URL still leased
+                frontier.fail(fp)
+                continue
+            if max_pages is None or depth + 1 < max_pages:
+                # Later pages of a listing rank below its first pages, so sites progress breadth-first
+                frontier.add([(site, link) for link in discover_pagination(html, url)],
+                             priority=-(depth + 1), depth=depth + 1)
+            frontier.complete(fp, site, rows)
+            done += 1
+    finally:
+        session.close()
+        frontier.close()
+    return done
+
+
+def crawl(sites: List[Dict[str, str]], workers: int = 4, path: str = FRONTIER_DB, max_pages: Optional[int] = None,
+          extractor: str = 'auto', fresh: bool = True, on_batch: Optional[Callable[[pd.DataFrame], None]] = None,
+          poll_s: float = 1.0) -> pd.DataFrame:
+    # Seed the frontier and drain it with `workers` processes. With fresh=False an
+    # interrupted crawl resumes where it stopped (expired leases are re-queued).
+    # on_batch receives the rows of newly completed pages while the crawl runs,
+    # e.g. KpiState.update for live KPIs.
+    if fresh:
+        for suffix in ('', '-wal', '-shm'):
+            Path(path + suffix).unlink(missing_ok=True)
+    frontier = Frontier(path)
+    seed(frontier, sites)
+    last = 0
+    if workers <= 1:
+        worker(path, extractor, max_pages)
+    else:
+        procs = [mp.Process(target=worker, args=(path, extractor, max_pages)) for _ in range(workers)]
+        for p in procs:
+            p.start()
+        while any(p.is_alive() for p in procs):
+            time.sleep(poll_s)
+            if on_batch is not None:
+                batch, last = frontier.results_since(last)
+                if not batch.empty:
+                    on_batch(batch)
+        for p in procs:
+            p.join()
+    if on_batch is not None:
+        batch, last = frontier.results_since(last)
+        if not batch.empty:
+            on_batch(batch)
+    df = frontier.results()
+    frontier.close()
+    return df
+
+
+def load_sites(path: str) -> List[Dict[str, str]]:
+    # CSV or JSON list with site, url, type (and optionally delay_s) per entry
+    if path.endswith('.json'):
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    return pd.read_csv(path).to_dict('records')
+
+
+def main() -> None:
+    from asseco_webscraping_pipeline import SITES
+
+    parser = argparse.ArgumentParser(description='Crawl all site listings through a shared, deduplicated frontier')
+    parser.add_argument('--sites', help='CSV/JSON site list (site, url, type); defaults to the pipeline SITES')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-pages', type=int, default=None, help='pages per listing (default: follow all)')
+    parser.add_argument('--resume', action='store_true', help=f'continue the crawl in {FRONTIER_DB}')
+    args = parser.parse_args()
+
+    if not HAVE_REQUESTS:
+        raise SystemExit('requests is required for crawling')
+    sites = load_sites(args.sites) if args.sites else SITES
+    t0 = time.perf_counter()
+    kpis = KpiState()
+
+    def live(batch: pd.DataFrame) -> None:
+        kpis.update(batch)
+        rows = sum(s.rows for s in kpis.sites.values())
+        print(f'   {time.perf_counter() - t0:6.1f}s  {rows:,} rows from {len(kpis.sites)} sites')
+
+    df = crawl(sites, workers=args.workers, max_pages=args.max_pages, fresh=not args.resume, on_batch=live)
+    frontier = Frontier(FRONTIER_DB)
+    stats = frontier.stats()
+    frontier.close()
+    print('✅ Crawl completed:')
+    print(f' - Frontier: {FRONTIER_DB} {stats}')
+    print(f' - Rows scraped: {len(df):,} in {time.perf_counter() - t0:.1f}s')
+    print(kpis.kpis().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Union
+
+import pandas as pd
+
+try:
+    from openpyxl import Workbook
+    HAVE_OPENPYXL = True
+except Exception:
+    HAVE_OPENPYXL = False
+
+EXCEL_MAX_ROWS = 1_048_576         # per sheet, header included
+SIDECAR_THRESHOLD = 2_000_000      # larger tables go to a Parquet/CSV sidecar instead of the workbook
+CHUNK_ROWS = 50_000
+
+Table = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+def _chunks(table: Table, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    frames = [table] if isinstance(table, pd.DataFrame) else table
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+
+def _excel_rows(chunk: pd.DataFrame) -> Iterator[tuple]:
+    # NaN/NaT become empty cells, as with DataFrame.to_excel
+    return chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_sidecar(table: Table, path: Path) -> Path:
+    # Parquet when pyarrow is available, otherwise CSV; both written chunk by chunk
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except Exception:
+        path = path.with_suffix('.csv')
+        for i, chunk in enumerate(_chunks(table)):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        return path
+    path = path.with_suffix('.parquet')
+    writer = None
+    try:
+        for chunk in _chunks(table):
+            batch = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression='zstd')
+            writer.write_table(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def write_excel_streaming(sheets: Dict[str, Table], out_path: str, max_rows: int = EXCEL_MAX_ROWS,
+                          sidecar_threshold: int = SIDECAR_THRESHOLD) -> List[Path]:
+    # Write-only (streaming) workbook: rows are appended and flushed, so memory stays
+    # constant in the number of rows. A sheet past max_rows continues in
+    # '<name>_2', '<name>_3', ... Tables whose row count is known to exceed
+    # sidecar_threshold (or any table when openpyxl is missing) are written next to
+    # the workbook as '<stem>_<sheet>.parquet' (or .csv) instead.
+    out_path = Path(out_path)
+    written: List[Path] = []
+    wb = Workbook(write_only=True) if HAVE_OPENPYXL else None
+    for name, table in sheets.items():
+        n_rows = len(table) if isinstance(table, pd.DataFrame) else None
+        if wb is None or (n_rows is not None and n_rows > sidecar_threshold):
+            sidecar = write_sidecar(table, out_path.with_name(f'{out_path.stem}_{name}'))
+            written.append(sidecar)
+            if wb is not None:
+                ws = wb.create_sheet(name)
+                ws.append([f'{n_rows:,} rows exported to {sidecar.name}'])
+            continue
+
+        part, ws, used = 1, None, 0
+        for chunk in _chunks(table):
+            rows = _excel_rows(chunk)
+            for row in rows:
+                if ws is None or used >= max_rows:
+                    ws = wb.create_sheet(name if part == 1 else f'{name}_{part}')
+                    ws.append(list(chunk.columns))
+                    part, used = part + 1, 1
+                ws.append(row)
+                used += 1
+        if ws is None:
+            wb.create_sheet(name).append(list(table.columns) if isinstance(table, pd.DataFrame) else [])
+    if wb is not None:
+        wb.save(out_path)
+        written.insert(0, out_path)
+    return written
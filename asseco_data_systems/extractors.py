@@ -0,0 +1,99 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from asseco_webscraping_pipeline import parse_books_page
+
+try:
+    from lxml import etree, html as lxml_html
+    HAVE_LXML = True
+except Exception:
+    HAVE_LXML = False
+
+# An extractor turns one catalogue page into product rows: (html, site) -> rows
+Extractor = Callable[[str, str], List[Dict]]
+
+if HAVE_LXML:
+    # Compiled once at import; each page costs one libxml2 parse plus a few XPath calls
+    _PRODUCTS = etree.XPath('//article[contains(concat(" ", normalize-space(@class), " "), " product_pod ")]')
+    _TITLE = etree.XPath('string(.//h3/a/@title)')
+    _PRICE = etree.XPath('string(.//*[contains(concat(" ", normalize-space(@class), " "), " price_color ")])')
+    _AVAILABILITY = etree.XPath('.//*[contains(concat(" ", normalize-space(@class), " "), " availability ")]')
+    _RATING = etree.XPath('string(.//*[contains(concat(" ", normalize-space(@class), " "), " star-rating ")]/@class)')
+
+
+def parse_books_page_lxml(html: str, site: str = 'books_demo') -> List[Dict]:
+    rows = []
+    doc = lxml_html.document_fromstring(html)
+    for article in _PRODUCTS(doc):
+        availability = _AVAILABILITY(article)
+        rating_cls = _RATING(article).split()
+        rows.append({
+            'site': site,
+            'product': _TITLE(article).strip(),
+            'price': float(_PRICE(article).replace('£', '').strip()),
+            # Same as BeautifulSoup get_text(strip=True): strip every text node, then join
+            'availability': ''.join(t.strip() for t in availability[0].itertext()) if availability else '',
+            'rating_label': rating_cls[1] if len(rating_cls) > 1 else 'NA',
+            'category': 'Books'
+        })
+    return rows
+
+
+EXTRACTORS: Dict[str, Extractor] = {'bs4': parse_books_page}
+if HAVE_LXML:
+    EXTRACTORS['lxml'] = parse_books_page_lxml
+
+
+def get_extractor(name: str = 'auto') -> Extractor:
+    if name == 'auto':
+        name = 'lxml' if HAVE_LXML else 'bs4'
+    if name not in EXTRACTORS:
+        raise ValueError(f'Unknown or unavailable extractor {name!r}; available: {sorted(EXTRACTORS)}')
+    return EXTRACTORS[name]
+
+
+def verify(pages: List[str], candidate: str, reference: str = 'bs4') -> List[int]:
+    # Indices of pages where the candidate's rows differ from the reference parser
+    ref, cand = get_extractor(reference), get_extractor(candidate)
+    return [i for i, page in enumerate(pages) if ref(page, 'fixture') != cand(page, 'fixture')]
+
+
+def benchmark(pages: List[str], names: List[str] = None, min_time_s: float = 1.0) -> Dict[str, float]:
+    results = {}
+    for name in names or sorted(EXTRACTORS):
+        extract = get_extractor(name)
+        done, t0 = 0, time.perf_counter()
+        while True:
+            for page in pages:
+                extract(page, 'fixture')
+            done += len(pages)
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time_s:
+                break
+        results[name] = done / elapsed
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check extractors against BeautifulSoup and report pages/sec')
+    parser.add_argument('fixtures', type=Path, help='directory of saved catalogue pages (*.html)')
+    parser.add_argument('--min-time', type=float, default=1.0)
+    args = parser.parse_args()
+
+    pages = [p.read_text(encoding='utf-8') for p in sorted(args.fixtures.rglob('*.html'))]
+    if not pages:
+        raise SystemExit(f'No .html fixtures under {args.fixtures}')
+    for name in sorted(EXTRACTORS):
+        if name != 'bs4':
+            mismatches = verify(pages, name)
+            status = 'OK' if not mismatches else f'{len(mismatches)} mismatching pages, e.g. #{mismatches[0]}'
+            print(f'{name}: {status}')
+    rates = benchmark(pages, min_time_s=args.min_time)
+    for name, rate in rates.items():
+        print(f'{name:>5}: {rate:,.0f} pages/s ({rate / rates["bs4"]:.1f}x bs4)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_DIR = Path('.http_cache')
+MAX_BYTES = 256 * 1024 * 1024
+MAX_AGE_S = 30 * 24 * 3600
+
+# The product listing of a catalogue page; the rest (header, sidebar, pager) does not affect parsed rows
+PRODUCT_BLOCK = re.compile(r'<ol class="row">.*?</ol>', re.S)
+
+
+def product_block_hash(html: str) -> str:
+    blocks = PRODUCT_BLOCK.findall(html)
+    payload = ''.join(blocks) if blocks else html
+    return hashlib.sha1(payload.encode('utf-8', errors='replace')).hexdigest()
+
+
+class HttpCache:
+    # On-disk cache keyed by (URL, parser): stores ETag/Last-Modified for
+    # conditional requests, the hash of the product block and the rows parsed
+    # from it. A 304 or an unchanged product block means the cached rows are
+    # reused without parsing, so the page body itself is not kept.
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = MAX_BYTES, max_age_s: float = MAX_AGE_S):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.db = sqlite3.connect(self.root / 'index.sqlite')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                block_hash TEXT,
+                rows TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+        columns = [c[1] for c in self.db.execute('PRAGMA table_info(pages)')]
+        if 'body' in columns:
+            # Caches written before bodies were dropped: free the space they took
+            self.db.execute('ALTER TABLE pages DROP COLUMN body')
+            self.db.execute('UPDATE pages SET size = LENGTH(rows)')
+            self.db.commit()
+            self.db.execute('VACUUM')
+        self.db.commit()
+
+    @staticmethod
+    def key(url: str, parser_name: str) -> str:
+        return f'{parser_name}|{url}'
+
+    def _get(self, key: str) -> Optional[tuple]:
+        row = self.db.execute(
+            'SELECT etag, last_modified, block_hash, rows, fetched_at FROM pages WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[4] > self.max_age_s:
+            self.db.execute('DELETE FROM pages WHERE key = ?', (key,))
+            return None
+        return row
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        row = self._get(key)
+        headers = {}
+        if row is not None:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def rows(self, key: str) -> Optional[List[Dict]]:
+        row = self._get(key)
+        if row is None or row[3] is None:
+            return None
+        self.db.execute('UPDATE pages SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[3])
+
+    def rows_if_unchanged(self, key: str, block_hash: str) -> Optional[List[Dict]]:
+        row = self._get(key)
+        if row is None or row[2] != block_hash:
+            return None
+        return self.rows(key)
+
+    def touch(self, key: str, headers: Dict[str, str]) -> None:
+        # A 304 may carry refreshed validators
+        self.db.execute(
+            'UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), '
+            'fetched_at = ?, accessed_at = ? WHERE key = ?',
+            (headers.get('ETag'), headers.get('Last-Modified'), time.time(), time.time(), key))
+
+    def store(self, key: str, url: str, headers: Dict[str, str], block_hash: str, rows: List[Dict]) -> None:
+        rows_json = json.dumps(rows)
+        now = time.time()
+        self.db.execute(
+            'INSERT OR REPLACE INTO pages (key, url, etag, last_modified, block_hash, rows, size, fetched_at, '
+            'accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, url, headers.get('ETag'), headers.get('Last-Modified'), block_hash, rows_json, len(rows_json),
+             now, now))
+
+    def evict(self) -> int:
+        # Age first, then least-recently-used entries until the cache fits in max_bytes
+        removed = self.db.execute('DELETE FROM pages WHERE fetched_at < ?', (time.time() - self.max_age_s,)).rowcount
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            for key, size in self.db.execute('SELECT key, size FROM pages ORDER BY accessed_at').fetchall():
+                if excess <= 0:
+                    break
+                self.db.execute('DELETE FROM pages WHERE key = ?', (key,))
+                excess -= size
+                removed += 1
+        self.db.commit()
+        if removed:
+            # SQLite only reuses freed pages; VACUUM gives the space back to the file system
+            self.db.execute('VACUUM')
+        return removed
+
+    def close(self) -> None:
+        self.evict()
+        self.db.close()
@@ -0,0 +1,149 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+KPI_COLUMNS = ['site', 'products', 'avg_price', 'median_price', 'in_stock_rate']
+SKETCH_ALPHA = 0.005  # relative error of the sketched median
+
+
+class QuantileSketch:
+    # Log-bucketed histogram (DDSketch): bucket k holds values in (g^(k-1), g^k] with
+    # g = (1+alpha)/(1-alpha), so any quantile is returned within `alpha` relative
+    # error. Memory grows with the log of the value range, not the number of values,
+    # and two sketches merge by adding bucket counts.
+    def __init__(self, alpha: float = SKETCH_ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0  # values <= 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.buckets.values())
+
+    def update(self, values: np.ndarray) -> 'QuantileSketch':
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.zeros += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        if other.alpha != self.alpha:
+            raise ValueError('Cannot merge sketches with different alpha')
+        self.zeros += other.zeros
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        return self
+
+    def _value_at(self, rank: int) -> float:
+        # Estimate of the rank-th smallest value (0-based)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen > rank:
+                return 2 * self.gamma ** k / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        # Linear interpolation between ranks, as pandas does (so the median of an even count averages two values)
+        n = self.count
+        if n == 0:
+            return float('nan')
+        rank = q * (n - 1)
+        lo, hi = math.floor(rank), math.ceil(rank)
+        if lo == hi:
+            return self._value_at(lo)
+        return self._value_at(lo) + (self._value_at(hi) - self._value_at(lo)) * (rank - lo)
+
+
+@dataclass
+class SiteState:
+    products: int = 0      # rows with a product name, as ('product', 'count')
+    rows: int = 0
+    in_stock: int = 0
+    price_n: int = 0
+    price_sum: float = 0.0
+    prices: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def merge(self, other: 'SiteState') -> 'SiteState':
+        self.products += other.products
+        self.rows += other.rows
+        self.in_stock += other.in_stock
+        self.price_n += other.price_n
+        self.price_sum += other.price_sum
+        self.prices.merge(other.prices)
+        return self
+
+
+class KpiState:
+    # Per-site running totals behind compute_kpis. update() costs O(batch), so KPIs
+    # can be refreshed after every scraped batch; states built by separate workers
+    # or runs combine with merge(). median_price here is the sketch estimate (within
+    # SKETCH_ALPHA); compute_kpis replaces it with the exact median.
+    def __init__(self):
+        self.sites: Dict[str, SiteState] = {}
+
+    def update(self, batch: pd.DataFrame) -> 'KpiState':
+        batch = batch[batch['site'].notna()]  # groupby('site') drops these too
+        if batch.empty:
+            return self
+        # The availability text has a handful of distinct values: test each once, then map by code
+        avail_codes, avail_values = pd.factorize(batch['availability'])
+        is_in_stock = pd.Series(avail_values).str.contains('In stock', case=False, na=False).to_numpy()
+        in_stock = np.where(avail_codes >= 0, is_in_stock[avail_codes], False)
+
+        site_codes, site_values = pd.factorize(batch['site'], sort=True)
+        n_sites = len(site_values)
+        price = batch['price'].to_numpy(dtype=float)
+        has_price = ~np.isnan(price)
+        rows = np.bincount(site_codes, minlength=n_sites)
+        products = np.bincount(site_codes, weights=batch['product'].notna().to_numpy(), minlength=n_sites)
+        stocked = np.bincount(site_codes, weights=in_stock, minlength=n_sites)
+        price_n = np.bincount(site_codes, weights=has_price, minlength=n_sites)
+        price_sum = np.bincount(site_codes, weights=np.where(has_price, price, 0.0), minlength=n_sites)
+
+        order = np.argsort(site_codes, kind='stable')
+        bounds = np.cumsum(rows)[:-1]
+        for i, (site, idx) in enumerate(zip(site_values, np.split(order, bounds))):
+            state = self.sites.setdefault(site, SiteState())
+            state.rows += int(rows[i])
+            state.products += int(products[i])
+            state.in_stock += int(stocked[i])
+            state.price_n += int(price_n[i])
+            state.price_sum += float(price_sum[i])
+            state.prices.update(price[idx])
+        return self
+
+    def merge(self, other: 'KpiState') -> 'KpiState':
+        for site, state in other.sites.items():
+            self.sites.setdefault(site, SiteState()).merge(state)
+        return self
+
+    def kpis(self) -> pd.DataFrame:
+        records = []
+        for site in sorted(self.sites):
+            s = self.sites[site]
+            records.append({
+                'site': site,
+                'products': s.products,
+                'avg_price': round(s.price_sum / s.price_n, 2) if s.price_n else float('nan'),
+                'median_price': round(s.prices.quantile(0.5), 2),
+                'in_stock_rate': round(s.in_stock / s.rows * 100, 1) if s.rows else float('nan'),
+            })
+        return pd.DataFrame(records, columns=KPI_COLUMNS)
+
+
+def kpis_from_batches(batches: Iterable[pd.DataFrame], state: Optional[KpiState] = None) -> KpiState:
+    state = state or KpiState()
+    for batch in batches:
+        state.update(batch)
+    return state
@@ -0,0 +1,133 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+HISTORY_DB = 'asseco_price_history.sqlite'
+TRACKED = ['price', 'availability', 'rating_label']
+
+
+def _utc_iso(ts: datetime) -> str:
+    # Observations are stored as UTC ISO strings ending in Z; a naive `ts` is taken as UTC
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.replace(microsecond=0).isoformat() + 'Z'
+
+
+class PriceHistory:
+    # Embedded (SQLite) price history keyed by (site, product). A snapshot only
+    # adds an observation when one of the TRACKED fields differs from the latest
+    # known value, so repeat runs write just the changes.
+    def __init__(self, path: str = HISTORY_DB):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS observations (
+                site TEXT NOT NULL,
+                product TEXT NOT NULL,
+                observed_at TEXT NOT NULL,
+                price REAL,
+                availability TEXT,
+                rating_label TEXT,
+                category TEXT,
+                PRIMARY KEY (site, product, observed_at)
+            );
+            CREATE INDEX IF NOT EXISTS observations_time ON observations (observed_at);
+            CREATE TABLE IF NOT EXISTS latest (
+                site TEXT NOT NULL,
+                product TEXT NOT NULL,
+                observed_at TEXT NOT NULL,
+                price REAL,
+                availability TEXT,
+                rating_label TEXT,
+                PRIMARY KEY (site, product)
+            );
+        ''')
+
+    def latest(self) -> pd.DataFrame:
+        return pd.read_sql_query('SELECT * FROM latest', self.db)
+
+    def record(self, df: pd.DataFrame, observed_at: Optional[str] = None) -> int:
+        # Rows flagged `synthetic` (offline fallbacks) are not observations and are skipped
+        snap = df[~df['synthetic'].fillna(False).astype(bool)] if 'synthetic' in df.columns else df
+        snap = snap.copy()
+        if observed_at is not None or 'scrape_timestamp' not in snap.columns:
+            snap['scrape_timestamp'] = observed_at or _utc_iso(datetime.now(timezone.utc))
+        snap = snap.drop_duplicates(['site', 'product'], keep='last')
+        snap['rating_label'] = snap['rating_label'].astype(str)
+
+        prev = self.latest().set_index(['site', 'product'])[TRACKED]
+        merged = snap.join(prev, on=['site', 'product'], rsuffix='_prev')
+        changed = merged['price_prev'].isna()
+        for col in TRACKED:
+            changed |= merged[col].ne(merged[f'{col}_prev'])
+        new = merged.loc[changed]
+        if new.empty:
+            return 0
+
+        obs = list(new[['site', 'product', 'scrape_timestamp', 'price', 'availability', 'rating_label',
+                        'category']].itertuples(index=False, name=None))
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)', obs)
+            self.db.executemany('INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?, ?)',
+                                [o[:6] for o in obs])
+        return len(obs)
+
+    def price_changes(self, days: int = 7, now: Optional[datetime] = None) -> pd.DataFrame:
+        # Observations in the last `days` whose price differs from the previous one.
+        # The time index bounds the scan to the window plus each product's prior row.
+        since = _utc_iso((now or datetime.now(timezone.utc)) - timedelta(days=days)).rstrip('Z')
+        return pd.read_sql_query('''
+            SELECT o.site, o.product, o.observed_at,
+                   (SELECT p.price FROM observations p
+                     WHERE p.site = o.site AND p.product = o.product AND p.observed_at < o.observed_at
+                     ORDER BY p.observed_at DESC LIMIT 1) AS old_price,
+                   o.price AS new_price
+              FROM observations o
+             WHERE o.observed_at >= ?
+        ''', self.db, params=(since,), dtype={'old_price': float, 'new_price': float}
+        ).dropna(subset=['old_price']).query('old_price != new_price').assign(
+            change_pct=lambda d: ((d['new_price'] / d['old_price'] - 1) * 100).round(2)
+        ).reset_index(drop=True)
+
+    def site_coverage(self) -> pd.DataFrame:
+        return pd.read_sql_query('''
+            SELECT site, category, COUNT(DISTINCT product) AS products_scraped
+              FROM observations GROUP BY site, category
+        ''', self.db)
+
+    def daily_prices(self, days: Optional[int] = None) -> pd.DataFrame:
+        # Long (date, site, product, price) frame on a daily grid, carrying each
+        # product's last observed price forward between changes. With `days`, only
+        # the window's observations plus each product's last one before it are read.
+        empty = pd.DataFrame(columns=['date', 'site', 'product', 'price'])
+        if days is None:
+            obs = pd.read_sql_query('SELECT site, product, observed_at, price FROM observations', self.db)
+            since = None
+        else:
+            last = self.db.execute('SELECT MAX(observed_at) FROM observations').fetchone()[0]
+            if last is None:
+                return empty
+            since = pd.Timestamp(last.rstrip('Z')).normalize() - pd.Timedelta(days=days - 1)
+            # SQLite returns the other columns of the MAX() row for a bare aggregate
+            obs = pd.read_sql_query('''
+                SELECT site, product, observed_at, price FROM observations WHERE observed_at >= :since
+                UNION ALL
+                SELECT site, product, MAX(observed_at), price FROM observations
+                 WHERE observed_at < :since GROUP BY site, product
+            ''', self.db, params={'since': since.strftime('%Y-%m-%d')})
+        if obs.empty:
+            return empty
+        obs['date'] = pd.to_datetime(obs['observed_at'].str.rstrip('Z')).dt.normalize()
+        if since is not None:
+            obs['date'] = obs['date'].clip(lower=since)
+        obs = obs.sort_values('observed_at', kind='stable')
+        wide = obs.pivot_table(index='date', columns=['site', 'product'], values='price', aggfunc='last')
+        wide = wide.reindex(pd.date_range(since or wide.index.min(), wide.index.max(), freq='D')).ffill()
+        out = wide.stack(['site', 'product'], future_stack=True).dropna().rename('price').reset_index()
+        return out.rename(columns={'level_0': 'date'})
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,104 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+METRICS_DB = 'asseco_scrape_metrics.sqlite'
+# Log-spaced latency buckets (ms) for the per-site histograms
+LATENCY_BUCKETS_MS = [0, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, np.inf]
+
+
+class ScrapeTelemetry:
+    # Compact per-request log (one narrow row per fetch) plus the per-site
+    # summaries that feed asseco_visualization and per-host throttling
+    def __init__(self, path: str = METRICS_DB):
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS requests (
+                run_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                site TEXT NOT NULL,
+                host TEXT NOT NULL,
+                status INTEGER,
+                bytes INTEGER,
+                latency_ms REAL,
+                wait_ms REAL,
+                backoff_ms REAL,
+                retries INTEGER,
+                parse_ms REAL,
+                cache TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS requests_site_ts ON requests (site, ts);
+        ''')
+        columns = {c[1] for c in self.db.execute('PRAGMA table_info(requests)')}
+        for column in ('wait_ms', 'backoff_ms'):
+            if column not in columns:
+                # Logs written before waits were split out of latency
+                self.db.execute(f'ALTER TABLE requests ADD COLUMN {column} REAL')
+        self.db.commit()
+
+    def record(self, results: Iterable, run_id: Optional[str] = None) -> int:
+        now = time.time()
+        run_id = run_id or time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))
+        # latency_ms is the server's answer time only; our own queueing, politeness
+        # delay and retry backoff are logged separately so they cannot pass for slowness
+        rows = [(run_id, now, r.site, urlsplit(r.url).netloc, r.status, r.bytes, r.latency_s * 1000,
+                 r.wait_s * 1000, r.backoff_s * 1000, r.retries, r.parse_s * 1000, r.cache, r.error)
+                for r in results]
+        with self.db:
+            self.db.executemany(
+                'INSERT INTO requests (run_id, ts, site, host, status, bytes, latency_ms, wait_ms, backoff_ms, '
+                'retries, parse_ms, cache, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def requests(self, days: Optional[float] = None) -> pd.DataFrame:
+        since = 0 if days is None else time.time() - days * 86400
+        return pd.read_sql_query('SELECT * FROM requests WHERE ts >= ?', self.db, params=(since,))
+
+    def site_stats(self, days: Optional[float] = None) -> pd.DataFrame:
+        req = self.requests(days)
+        if req.empty:
+            return pd.DataFrame(columns=['site', 'host', 'requests', 'success_rate', 'avg_response_ms', 'p50_ms',
+                                         'p95_ms', 'p99_ms', 'avg_wait_ms', 'avg_backoff_ms', 'avg_bytes', 'retries',
+                                         'avg_parse_ms'])
+        req['ok'] = req['status'].between(200, 399)
+        stats = req.groupby('site').agg(
+            host=('host', 'first'),
+            requests=('ok', 'size'),
+            success_rate=('ok', 'mean'),
+            avg_response_ms=('latency_ms', 'mean'),
+            p50_ms=('latency_ms', lambda s: s.quantile(0.50)),
+            p95_ms=('latency_ms', lambda s: s.quantile(0.95)),
+            p99_ms=('latency_ms', lambda s: s.quantile(0.99)),
+            avg_wait_ms=('wait_ms', 'mean'),
+            avg_backoff_ms=('backoff_ms', 'mean'),
+            avg_bytes=('bytes', 'mean'),
+            retries=('retries', 'sum'),
+            avg_parse_ms=('parse_ms', 'mean'),
+        )
+        return stats.round(1).reset_index()
+
+    def latency_histograms(self, days: Optional[float] = None) -> pd.DataFrame:
+        # site x bucket counts; columns are the bucket upper bounds in ms
+        req = self.requests(days)
+        buckets = pd.cut(req['latency_ms'], LATENCY_BUCKETS_MS, right=False)
+        return pd.crosstab(req['site'], buckets)
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def suggest_host_rates(stats: pd.DataFrame, base_rate: float, slow_p95_ms: float = 2000.0,
+                       min_rate: float = 0.2) -> Dict[str, float]:
+    # Scale a host's request rate down in proportion to how far its p95 latency
+    # (or failure rate) is above target; healthy hosts keep the base rate
+    rates = {}
+    for row in stats.itertuples(index=False):
+        factor = min(1.0, slow_p95_ms / row.p95_ms) if row.p95_ms > 0 else 1.0
+        factor *= min(1.0, row.success_rate / 0.9) if row.success_rate > 0 else 0.0
+        rates[row.host] = max(min_rate, round(base_rate * factor, 2))
+    return rates
@@ -0,0 +1,33 @@
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+FIXTURES_DIR = PROJECT_DIR / 'fixtures' / 'books'
+sys.path.insert(0, str(PROJECT_DIR))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_pages():
+    return {p.relative_to(FIXTURES_DIR).as_posix(): p.read_text(encoding='utf-8')
+            for p in sorted(FIXTURES_DIR.rglob('*.html'))}
+
+
+@pytest.fixture
+def books_server():
+    # The fixture catalogue served over HTTP (ETag-less, Last-Modified / 304 from http.server)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_QuietHandler, directory=str(FIXTURES_DIR)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
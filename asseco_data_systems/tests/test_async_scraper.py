@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from async_scraper import AsyncScraper, books_jobs, scrape_sites_async  # noqa: E402
+from asseco_webscraping_pipeline import parse_books_page  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+
+
+def test_scrape_fixture_site(books_server, fixture_pages):
+    sites = [{'site': 'books_demo', 'url': books_server, 'type': 'books'}]
+    df = scrape_sites_async(sites, limit_pages=3, extractor='bs4', rate_per_host=50, burst=10)
+    expected = [row for name in ('index.html', 'catalogue/page-2.html', 'catalogue/page-3.html')
+                for row in parse_books_page(fixture_pages[name])]
+    assert df.to_dict('records') == expected
+
+
+def test_missing_page_is_reported_not_retried(books_server):
+    engine = AsyncScraper(rate_per_host=50, burst=10, retries=2, backoff_s=0.01)
+    rows, results = engine.run(books_jobs([{'site': 'books_demo', 'url': books_server, 'type': 'books'}],
+                                          limit_pages=4, extractor='bs4'))
+    assert len(rows) == 9
+    assert [r.status for r in results] == [200, 200, 200, 404]
+    assert results[-1].retries == 0
+
+
+def test_cached_rerun_uses_conditional_requests(books_server, tmp_path):
+    sites = [{'site': 'books_demo', 'url': books_server, 'type': 'books'}]
+    first = scrape_sites_async(sites, limit_pages=3, cache_dir=str(tmp_path), rate_per_host=50, burst=10)
+    engine = AsyncScraper(rate_per_host=50, burst=10)
+    engine.cache = HttpCache(str(tmp_path))
+    try:
+        rows, results = engine.run(books_jobs(sites, limit_pages=3))
+    finally:
+        engine.cache.close()
+    assert {r.cache for r in results} == {'not-modified'}
+    assert rows == first.to_dict('records')
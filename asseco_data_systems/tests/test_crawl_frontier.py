@@ -0,0 +1,47 @@
+import json
+import sqlite3
+
+import crawl_frontier
+from crawl_frontier import Frontier, seed, worker
+
+
+def _boom(html, site):
+    raise ValueError('extractor failure')
+
+
+def test_extractor_error_fails_url_instead_of_killing_worker(books_server, tmp_path, monkeypatch):
+    path = str(tmp_path / 'frontier.sqlite')
+    frontier = Frontier(path)
+    seed(frontier, [{'site': 'books_demo', 'url': books_server, 'type': 'books'}], delay_s=0.0)
+    frontier.close()
+
+    monkeypatch.setattr(crawl_frontier, 'get_extractor', lambda name: _boom)
+    assert worker(path, max_pages=1) == 0
+
+    frontier = Frontier(path)
+    try:
+        assert frontier.stats() == {'failed': 1}
+        assert frontier.pending() == 0
+    finally:
+        frontier.close()
+
+
+def test_old_frontier_results_get_seq_column(tmp_path):
+    # Results tables from before results_since() had no seq column
+    path = str(tmp_path / 'frontier.sqlite')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE results (fp INTEGER PRIMARY KEY, site TEXT NOT NULL, rows TEXT NOT NULL)')
+    db.executemany('INSERT INTO results VALUES (?, ?, ?)',
+                   [(7, 'a', json.dumps([{'n': 1}])), (3, 'a', json.dumps([{'n': 2}]))])
+    db.commit()
+    db.close()
+
+    frontier = Frontier(path)
+    try:
+        old, seq = frontier.results_since(0)
+        assert sorted(old['n']) == [1, 2] and seq == 2
+        frontier.complete(11, 'a', [{'n': 3}])
+        new, seq = frontier.results_since(seq)
+        assert new.to_dict('records') == [{'n': 3}] and seq == 3
+    finally:
+        frontier.close()
@@ -0,0 +1,27 @@
+import pytest
+
+from asseco_webscraping_pipeline import parse_books_page
+from extractors import EXTRACTORS, get_extractor, verify
+
+pytest.importorskip('lxml')
+
+
+def test_lxml_matches_bs4_on_fixture_pages(fixture_pages):
+    pages = list(fixture_pages.values())
+    assert verify(pages, 'lxml') == []
+    for page in pages:
+        assert get_extractor('lxml')(page, 'books_demo') == parse_books_page(page, 'books_demo')
+
+
+def test_fixture_fields(fixture_pages):
+    rows = get_extractor('lxml')(fixture_pages['catalogue/page-2.html'], 'books_demo')
+    assert [r['product'] for r in rows] == ['In Her Wake', 'Müller & Söhne: A Family Saga', 'How Music Works']
+    assert [r['price'] for r in rows] == [12.84, 33.63, 37.32]
+    assert rows[1]['availability'] == 'In stock (3 available)'
+    assert [r['rating_label'] for r in rows] == ['One', 'Two', 'NA']
+
+
+def test_unknown_extractor():
+    with pytest.raises(ValueError):
+        get_extractor('regex')
+    assert 'bs4' in EXTRACTORS
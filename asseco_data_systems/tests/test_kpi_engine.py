@@ -0,0 +1,20 @@
+import pandas as pd
+
+from asseco_webscraping_pipeline import compute_kpis, synthetic_site
+from kpi_engine import SKETCH_ALPHA, KpiState
+
+
+def test_compute_kpis_matches_groupby():
+    df = pd.concat([synthetic_site(f'site_{i}', 'Books') for i in range(3)], ignore_index=True)
+    kpis = compute_kpis(df).set_index('site')
+    grouped = df.groupby('site')['price']
+    pd.testing.assert_series_equal(kpis['median_price'], grouped.median().round(2), check_names=False)
+    pd.testing.assert_series_equal(kpis['avg_price'], grouped.mean().round(2), check_names=False)
+
+
+def test_merged_sketch_median_within_alpha():
+    df = pd.concat([synthetic_site('site_a', 'Books') for _ in range(4)], ignore_index=True)
+    state = KpiState().update(df.iloc[:200]).merge(KpiState().update(df.iloc[200:]))
+    estimate = state.kpis().set_index('site').loc['site_a', 'median_price']
+    exact = df['price'].median()
+    assert abs(estimate - exact) <= SKETCH_ALPHA * exact + 0.01
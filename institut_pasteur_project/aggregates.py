@@ -0,0 +1,84 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Resolution ladder for the time-series chart: pandas resample rule per level
+RESOLUTIONS = {'daily': 'D', 'weekly': 'W', 'monthly': 'MS'}
+MAX_POINTS = 1000
+HIST_BINS = 30
+
+
+def rollup(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    out = df.set_index('date').resample(rule).agg(
+        eggs=('eggs', 'mean'),
+        eggs_min=('eggs', 'min'),
+        eggs_max=('eggs', 'max'),
+        temperature=('temperature', 'mean'),
+        humidity=('humidity', 'mean'),
+        rainfall=('rainfall', 'mean'),
+        n=('eggs', 'size'),
+    )
+    return out[out['n'] > 0].reset_index()
+
+
+class DashboardTiles:
+    # Server-side aggregates for app.py: daily/weekly/monthly rollups built once,
+    # plus per-row 2-D bin codes for the climate-vs-eggs scatters so a date range
+    # turns into one bincount over fixed global bin edges.
+    def __init__(self, df: pd.DataFrame, scatter_x: Tuple[str, ...] = ('temperature', 'rainfall'),
+                 y: str = 'eggs', bins: int = HIST_BINS):
+        df = df.sort_values('date').reset_index(drop=True)
+        self.rollups: Dict[str, pd.DataFrame] = {name: rollup(df, rule) for name, rule in RESOLUTIONS.items()}
+        self.dates = df['date'].to_numpy()
+        self.bins = bins
+        self.y = y
+        self.y_edges = self._edges(df[y])
+        y_codes = self._codes(df[y], self.y_edges)
+        self.x_edges: Dict[str, np.ndarray] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for x in scatter_x:
+            self.x_edges[x] = self._edges(df[x])
+            self.codes[x] = (self._codes(df[x], self.x_edges[x]) * bins + y_codes).astype(np.int32)
+
+    def _edges(self, s: pd.Series) -> np.ndarray:
+        lo, hi = float(s.min()), float(s.max())
+        return np.linspace(lo, hi if hi > lo else lo + 1.0, self.bins + 1)
+
+    def _codes(self, s: pd.Series, edges: np.ndarray) -> np.ndarray:
+        return np.clip(np.searchsorted(edges, s.to_numpy(), side='right') - 1, 0, self.bins - 1)
+
+    @staticmethod
+    def resolution_for(start, end, max_points: int = MAX_POINTS) -> str:
+        days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+        if days <= max_points:
+            return 'daily'
+        if days / 7 <= max_points:
+            return 'weekly'
+        return 'monthly'
+
+    def timeseries(self, start, end, max_points: int = MAX_POINTS,
+                   resolution: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+        resolution = resolution or self.resolution_for(start, end, max_points)
+        table = self.rollups[resolution]
+        dates = table['date']
+        lo = dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = dates.searchsorted(pd.Timestamp(end), side='right')
+        out = table.iloc[lo:hi]
+        if len(out) > max_points:
+            # Hard cap even at the coarsest level: keep every k-th bucket
+            out = out.iloc[::int(np.ceil(len(out) / max_points))]
+        return out.reset_index(drop=True), resolution
+
+    def histogram(self, x: str, start, end) -> pd.DataFrame:
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end)), side='right')
+        counts = np.bincount(self.codes[x][lo:hi], minlength=self.bins * self.bins)
+        nz = np.flatnonzero(counts)
+        xi, yi = np.divmod(nz, self.bins)
+        xe, ye = self.x_edges[x], self.y_edges
+        return pd.DataFrame({
+            f'{x}_start': xe[xi], f'{x}_end': xe[xi + 1],
+            f'{self.y}_start': ye[yi], f'{self.y}_end': ye[yi + 1],
+            'count': counts[nz],
+        })
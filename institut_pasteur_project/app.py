@@ -1,71 +1,181 @@
+import matplotlib
 import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
+import threading
+import time
 from pathlib import Path
 
+from aggregates import MAX_POINTS, DashboardTiles
+from storage import METRICS_PARQUET, TIMESERIES_DIR, date_bounds, read_metrics, read_timeseries
+
+# The modeling job draws with pyplot from a background thread: never use a GUI backend
+matplotlib.use('Agg')
+
 st.set_page_config(page_title='Institut Pasteur – Mosquito Oviposition', layout='wide')
 
 st.title('Institut Pasteur – Climate Impact on Mosquito Oviposition')
 st.caption('Synthetic demo for interview – explore climate variables and egg-laying index')
 
-DATA_CSV = Path('mosquito_timeseries.csv')
-METRICS_CSV = Path('model_metrics.csv')
+DATA_DIR = TIMESERIES_DIR
+METRICS_FILE = METRICS_PARQUET
+COLUMNS = ['date', 'temperature', 'humidity', 'rainfall', 'eggs']
+TILE_CACHE_ENTRIES = 4  # tile sets (dataset version × year span) kept in memory
 
 
-def ensure_data():
-    if DATA_CSV.exists() and METRICS_CSV.exists():
-        return
-    with st.spinner('Generating data (first run)...'):
+PLOTS = {
+    'Seasonality': Path('seasonality_plot.png'),
+    'Pred vs Actual – Linear': Path('pred_vs_actual_linear.png'),
+    'Pred vs Actual – Random Forest': Path('pred_vs_actual_rf.png'),
+    'Feature Importance': Path('feature_importance.png'),
+}
+
+
+class ModelingJob:
+    # Runs the modeling pipeline once per server process in a daemon thread;
+    # each stage (data -> metrics -> plots) becomes visible as soon as it is written
+    def __init__(self):
+        self.stages = set()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
         try:
-            from pasteur_modeling import main as run_model
-            run_model()
+            from pasteur_modeling import run_pipeline
+            run_pipeline(show_plots=False, on_stage=self.stages.add)
         except Exception as e:
-            st.error(f'Data generation failed: {e}')
+            self.error = e
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+
+@st.cache_resource
+def modeling_job() -> ModelingJob:
+    return ModelingJob()
+
+
+def ensure_data(timeout: float = 30.0):
+    if DATA_DIR.exists() and METRICS_FILE.exists():
+        return None
+    job = modeling_job()
+    # Only the (fast) data stage blocks the first paint; training and plots continue in the background
+    with st.spinner('Generating data (first run)...'):
+        deadline = time.monotonic() + timeout
+        while 'data' not in job.stages and job.running and time.monotonic() < deadline:
+            time.sleep(0.1)
+    if job.error:
+        st.error(f'Data generation failed: {job.error}')
+    return job
+
+
+def _mtime(path: Path) -> float:
+    return path.stat().st_mtime if path.exists() else 0.0
+
+
+@st.cache_data
+def load_bounds(mtime: float):
+    return date_bounds(DATA_DIR) if DATA_DIR.exists() else None
 
 
 @st.cache_data
-def load_data():
-    ensure_data()
-    df = pd.read_csv(DATA_CSV, parse_dates=['date']) if DATA_CSV.exists() else pd.DataFrame()
-    metrics = pd.read_csv(METRICS_CSV) if METRICS_CSV.exists() else pd.DataFrame()
-    return df, metrics
+def load_metrics(mtime: float):
+    return read_metrics(METRICS_FILE) if METRICS_FILE.exists() else pd.DataFrame()
+
+
+@st.cache_resource(max_entries=TILE_CACHE_ENTRIES)
+def load_tiles(mtime: float, first_year: int, last_year: int) -> DashboardTiles:
+    # Tiles over whole calendar years around the selection: the read is pushed down
+    # to those years' partitions, and any range within them is a slice of the same
+    # rollups. Load time follows the selected span, not the size of the archive.
+    start = pd.Timestamp(year=first_year, month=1, day=1)
+    end = pd.Timestamp(year=last_year + 1, month=1, day=1) - pd.Timedelta(1, 'ns')
+    return DashboardTiles(read_timeseries(DATA_DIR, columns=COLUMNS, start=start, end=end))
 
 
-df, metrics = load_data()
-if df.empty:
+job = ensure_data()
+data_mtime = _mtime(DATA_DIR)
+bounds = load_bounds(data_mtime)
+if bounds is None:
     st.warning('Data not available. Click Rerun (top-right) or try again in a few seconds.')
     st.stop()
 
 with st.sidebar:
     st.header('Filters')
-    date_min = st.date_input('Start date', df['date'].min().date())
-    date_max = st.date_input('End date', df['date'].max().date())
-    subset = df[(df['date'] >= pd.to_datetime(date_min)) & (df['date'] <= pd.to_datetime(date_max))]
+    date_min = st.date_input('Start date', bounds[0].date())
+    date_max = st.date_input('End date', bounds[1].date())
+    max_points = st.slider('Max chart points', 100, 5000, MAX_POINTS, step=100)
+
+if date_min > date_max:
+    st.warning('Start date is after end date.')
+    st.stop()
+
+tiles = load_tiles(data_mtime, date_min.year, date_max.year)
+
+# Charts receive pre-aggregated tiles, never the raw rows
+series, resolution = tiles.timeseries(date_min, date_max, max_points=max_points)
+if series.empty:
+    st.warning('No data in the selected date range.')
+    st.stop()
 
 st.subheader('Time Series')
-line = alt.Chart(subset).mark_line().encode(
-    x='date:T', y='eggs:Q', tooltip=['date:T', 'eggs:Q', 'temperature:Q', 'humidity:Q', 'rainfall:Q']
-).properties(height=250)
+st.caption(f'{resolution.capitalize()} resolution – {len(series):,} points')
+band = alt.Chart(series).mark_area(opacity=0.2, color='#4ECDC4').encode(x='date:T', y='eggs_min:Q', y2='eggs_max:Q')
+line = alt.Chart(series).mark_line().encode(
+    x='date:T', y='eggs:Q', tooltip=['date:T', 'eggs:Q', 'temperature:Q', 'humidity:Q', 'rainfall:Q', 'n:Q']
+)
 
 cols = st.columns(1)
-cols[0].altair_chart(line, use_container_width=True)
+cols[0].altair_chart((band + line).properties(height=250), use_container_width=True)
 
 st.subheader('Climate vs Eggs')
 left, right = st.columns(2)
 
-scatter1 = alt.Chart(subset).mark_circle(opacity=0.5).encode(
-    x='temperature:Q', y='eggs:Q', color=alt.value('#FF6B6B'), tooltip=['temperature', 'eggs']
-).properties(height=250)
-left.altair_chart(scatter1, use_container_width=True)
-
-scatter2 = alt.Chart(subset).mark_circle(opacity=0.5).encode(
-    x='rainfall:Q', y='eggs:Q', color=alt.value('#4ECDC4'), tooltip=['rainfall', 'eggs']
-).properties(height=250)
-right.altair_chart(scatter2, use_container_width=True)
-
-st.subheader('Model Metrics')
-if not metrics.empty:
-    st.dataframe(metrics.style.format({'MAE': '{:.2f}', 'R2': '{:.3f}'}), use_container_width=True)
-else:
-    st.info('Metrics not found yet.')
+
+def heatmap(x: str, scheme: str) -> alt.Chart:
+    hist = tiles.histogram(x, date_min, date_max)
+    return alt.Chart(hist).mark_rect().encode(
+        x=alt.X(f'{x}_start:Q', title=x), x2=f'{x}_end:Q',
+        y=alt.Y('eggs_start:Q', title='eggs'), y2='eggs_end:Q',
+        color=alt.Color('count:Q', scale=alt.Scale(scheme=scheme)),
+        tooltip=[f'{x}_start:Q', f'{x}_end:Q', 'eggs_start:Q', 'eggs_end:Q', 'count:Q'],
+    ).properties(height=250)
+
+
+left.altair_chart(heatmap('temperature', 'reds'), use_container_width=True)
+right.altair_chart(heatmap('rainfall', 'tealblues'), use_container_width=True)
+
+REFRESH_S = 2
+job_running = job is not None and job.running
+
+
+@st.fragment(run_every=REFRESH_S if job_running else None)
+def model_outputs():
+    # Re-polls while the background job is still training / plotting. run_every is
+    # fixed when the fragment is declared, so once the job is done a full rerun
+    # declares it again without polling.
+    if job_running and not job.running:
+        st.rerun()
+    st.subheader('Model Metrics')
+    metrics = load_metrics(_mtime(METRICS_FILE))
+    if not metrics.empty:
+        st.dataframe(metrics.style.format({'MAE': '{:.2f}', 'R2': '{:.3f}'}), use_container_width=True)
+    elif job is not None and job.running:
+        st.info('Training models in the background – metrics will appear here when ready.')
+    else:
+        st.info('Metrics not found yet.')
+
+    ready = {title: path for title, path in PLOTS.items() if path.exists()}
+    if ready or (job is not None and job.running):
+        st.subheader('Model Plots')
+        plot_cols = st.columns(2)
+        for i, (title, path) in enumerate(ready.items()):
+            plot_cols[i % 2].image(str(path), caption=title, use_container_width=True)
+        if len(ready) < len(PLOTS) and job is not None and job.running:
+            st.caption('Rendering remaining plots...')
+
+
+model_outputs()
@@ -0,0 +1,181 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from pasteur_modeling import DEFAULT_RF_PARAMS, OUTPUT_DIR, RANDOM_SEED, engineer_features, synthesize_data
+
+BACKTEST_CSV = OUTPUT_DIR / 'backtest_metrics.csv'
+
+Fold = Tuple[int, int, int, int]  # train_start, train_end, test_start, test_end (end exclusive)
+
+
+def make_folds(n: int, n_folds: int = 8, test_size: Optional[int] = None, min_train: Optional[int] = None,
+               mode: str = 'expanding') -> List[Fold]:
+    # Rolling-origin folds over time-ordered rows; the last fold ends at n.
+    # expanding: train always starts at 0; sliding: train keeps a fixed length of min_train.
+    if mode not in ('expanding', 'sliding'):
+        raise ValueError(f"mode must be 'expanding' or 'sliding', got {mode!r}")
+    min_train = min_train or n // 2
+    test_size = test_size or max(1, (n - min_train) // n_folds)
+    first_test = n - n_folds * test_size
+    if first_test < min_train:
+        raise ValueError(f'{n} rows are not enough for {n_folds} folds of {test_size} after {min_train} training rows')
+    folds = []
+    for k in range(n_folds):
+        test_start = first_test + k * test_size
+        train_start = 0 if mode == 'expanding' else test_start - min_train
+        folds.append((train_start, test_start, test_start, test_start + test_size))
+    return folds
+
+
+class IncrementalLinear:
+    # Ordinary least squares kept as sufficient statistics (X'X, X'y with an
+    # intercept column). Moving a fold boundary only adds/removes the rows that
+    # entered/left the window, so each refit costs O(changed rows * p^2 + p^3).
+    def __init__(self, n_features: int):
+        self.xtx = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+        self.coef_ = np.zeros(n_features + 1)
+
+    @staticmethod
+    def _design(X: np.ndarray) -> np.ndarray:
+        return np.column_stack([np.ones(len(X)), X])
+
+    def update(self, X: np.ndarray, y: np.ndarray, sign: float = 1.0) -> None:
+        if len(X):
+            Xd = self._design(X)
+            self.xtx += sign * (Xd.T @ Xd)
+            self.xty += sign * (Xd.T @ y)
+
+    def solve(self) -> 'IncrementalLinear':
+        # lstsq on the normal equations gives the minimum-norm solution, like
+        # LinearRegression, when lag/rolling columns are nearly collinear
+        self.coef_ = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self._design(X) @ self.coef_
+
+
+def _metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    return {'MAE': mean_absolute_error(y_true, y_pred), 'R2': r2_score(y_true, y_pred)}
+
+
+def _linear_folds(X: np.ndarray, y: np.ndarray, folds: List[Fold]) -> List[dict]:
+    model = IncrementalLinear(X.shape[1])
+    lo = hi = 0
+    rows = []
+    for k, (tr0, tr1, te0, te1) in enumerate(folds):
+        t0 = time.perf_counter()
+        model.update(X[hi:tr1], y[hi:tr1])            # rows entering the window
+        model.update(X[lo:tr0], y[lo:tr0], sign=-1.0)  # rows leaving it (sliding mode)
+        lo, hi = tr0, tr1
+        model.solve()
+        fit_s = time.perf_counter() - t0
+        rows.append({'fold': k, 'model': 'LinearRegression', 'fit_s': fit_s,
+                     **_metrics(y[te0:te1], model.predict(X[te0:te1]))})
+    return rows
+
+
+def _rf_fold(args) -> dict:
+    k, X_train, y_train, X_test, y_test, rf_params = args
+    t0 = time.perf_counter()
+    rf = RandomForestRegressor(**rf_params).fit(X_train, y_train)
+    fit_s = time.perf_counter() - t0
+    return {'fold': k, 'model': 'RandomForest', 'fit_s': fit_s, **_metrics(y_test, rf.predict(X_test))}
+
+
+def _rf_warm_folds(X: np.ndarray, y: np.ndarray, folds: List[Fold], rf_params: dict) -> List[dict]:
+    # Expanding folds only: keep the forest from the previous fold and grow
+    # trees_per_fold new trees on the enlarged window instead of refitting all of them
+    n_total = rf_params['n_estimators']
+    per_fold = max(1, n_total // len(folds))
+    rf = RandomForestRegressor(**{**rf_params, 'n_estimators': 0, 'warm_start': True})
+    rows = []
+    for k, (tr0, tr1, te0, te1) in enumerate(folds):
+        t0 = time.perf_counter()
+        rf.n_estimators = n_total if k == 0 else rf.n_estimators + per_fold
+        rf.fit(X[tr0:tr1], y[tr0:tr1])
+        fit_s = time.perf_counter() - t0
+        rows.append({'fold': k, 'model': 'RandomForest', 'fit_s': fit_s, 'n_trees': rf.n_estimators,
+                     **_metrics(y[te0:te1], rf.predict(X[te0:te1]))})
+    return rows
+
+
+def backtest(df_feat: pd.DataFrame, n_folds: int = 8, test_size: Optional[int] = None,
+             min_train: Optional[int] = None, mode: str = 'expanding', rf_params: Optional[dict] = None,
+             warm_start: bool = False, max_workers: Optional[int] = None) -> pd.DataFrame:
+    target = 'eggs'
+    df_feat = df_feat.sort_values('date').reset_index(drop=True)
+    feature_cols = [c for c in df_feat.columns if c not in ['date', target]]
+    X = df_feat[feature_cols].to_numpy(dtype=np.float64)
+    y = df_feat[target].to_numpy(dtype=np.float64)
+    folds = make_folds(len(df_feat), n_folds, test_size, min_train, mode)
+    # Forests are single-threaded: parallelism comes from running folds side by side
+    rf_params = {**DEFAULT_RF_PARAMS, 'random_state': RANDOM_SEED, 'n_jobs': 1, **(rf_params or {})}
+
+    rows = _linear_folds(X, y, folds)
+    if warm_start:
+        if mode != 'expanding':
+            raise ValueError('warm_start is only supported for expanding folds')
+        rows += _rf_warm_folds(X, y, folds, rf_params)
+    else:
+        tasks = [(k, X[tr0:tr1], y[tr0:tr1], X[te0:te1], y[te0:te1], rf_params)
+                 for k, (tr0, tr1, te0, te1) in enumerate(folds)]
+        if max_workers == 1:
+            rows += [_rf_fold(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                rows += list(pool.map(_rf_fold, tasks))
+
+    dates = df_feat['date']
+    bounds = pd.DataFrame([
+        {'fold': k, 'train_start': dates[tr0], 'train_end': dates[tr1 - 1], 'test_start': dates[te0],
+         'test_end': dates[te1 - 1], 'n_train': tr1 - tr0, 'n_test': te1 - te0}
+        for k, (tr0, tr1, te0, te1) in enumerate(folds)
+    ])
+    metrics = bounds.merge(pd.DataFrame(rows), on='fold')
+    return metrics.sort_values(['model', 'fold']).reset_index(drop=True)
+
+
+def summarize(metrics: pd.DataFrame) -> pd.DataFrame:
+    return metrics.groupby('model').agg(
+        folds=('fold', 'count'),
+        MAE_mean=('MAE', 'mean'),
+        MAE_std=('MAE', 'std'),
+        R2_mean=('R2', 'mean'),
+        R2_std=('R2', 'std'),
+        fit_s=('fit_s', 'sum'),
+    ).reset_index()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of the Pasteur models')
+    parser.add_argument('--days', type=int, default=900)
+    parser.add_argument('--folds', type=int, default=8)
+    parser.add_argument('--test-size', type=int, default=None)
+    parser.add_argument('--min-train', type=int, default=None)
+    parser.add_argument('--mode', choices=['expanding', 'sliding'], default='expanding')
+    parser.add_argument('--warm-start', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', type=Path, default=BACKTEST_CSV)
+    args = parser.parse_args()
+
+    df_feat = engineer_features(synthesize_data(days=args.days, seed=RANDOM_SEED))
+    metrics = backtest(df_feat, n_folds=args.folds, test_size=args.test_size, min_train=args.min_train,
+                       mode=args.mode, warm_start=args.warm_start, max_workers=args.workers)
+    metrics.to_csv(args.out, index=False)
+
+    print(summarize(metrics).to_string(index=False))
+    print(f'✅ Backtest complete: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from pasteur_modeling import CLIMATE_COLS, DEFAULT_LAGS, DEFAULT_WINDOWS, OUTPUT_DIR, feature_names
+from storage import DEFAULT_SITE, TIMESERIES_DIR, date_bounds, read_timeseries
+
+REGISTRY_DIR = OUTPUT_DIR / 'models'
+
+
+# ---------------------------------------------------------------- registry
+
+def save_models(models: Dict[str, object], feature_cols: Sequence[str], lags: Sequence[int] = DEFAULT_LAGS,
+                windows: Sequence[int] = DEFAULT_WINDOWS, metrics: Optional[pd.DataFrame] = None,
+                registry_dir: Path = REGISTRY_DIR) -> str:
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    out = registry_dir / version
+    out.mkdir(parents=True, exist_ok=True)
+    for name, model in models.items():
+        joblib.dump(model, out / f'{name}.joblib')
+    schema = {
+        'version': version,
+        'models': sorted(models),
+        'feature_cols': list(feature_cols),
+        'lags': list(lags),
+        'windows': list(windows),
+        'metrics': [] if metrics is None else metrics.to_dict('records'),
+    }
+    (out / 'schema.json').write_text(json.dumps(schema, indent=2))
+    (registry_dir / 'LATEST').write_text(version)
+    return version
+
+
+def load_models(version: str = 'latest', registry_dir: Path = REGISTRY_DIR):
+    if version == 'latest':
+        version = (registry_dir / 'LATEST').read_text().strip()
+    src = registry_dir / version
+    schema = json.loads((src / 'schema.json').read_text())
+    models = {name: joblib.load(src / f'{name}.joblib') for name in schema['models']}
+    for model in models.values():
+        # Single-row queries are dominated by thread dispatch when n_jobs=-1
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = 1
+    return models, schema
+
+
+# ---------------------------------------------------------------- forecasting
+
+class Forecaster:
+    # Keeps the last max(lag, window) days of climate readings per site in
+    # memory, so a query only needs today's readings: the feature vector is
+    # assembled from the warm buffer without rebuilding a DataFrame.
+    def __init__(self, models: Dict[str, object], schema: dict):
+        self.models = models
+        self.schema = schema
+        self.lags = schema['lags']
+        self.windows = schema['windows']
+        self.history = max(self.lags + [w - 1 for w in self.windows])
+        known = set(CLIMATE_COLS) | set(feature_names(self.lags, self.windows))
+        unknown = [c for c in schema['feature_cols'] if c not in known]
+        if unknown:
+            raise ValueError(f'Model feature schema has columns the forecaster cannot build: {unknown}')
+        self._buffers: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_registry(cls, version: str = 'latest', registry_dir: Path = REGISTRY_DIR) -> 'Forecaster':
+        return cls(*load_models(version, registry_dir))
+
+    def warm(self, df: pd.DataFrame, site_col: str = 'site') -> None:
+        df = df.sort_values('date')
+        groups = df.groupby(site_col) if site_col in df.columns else [(DEFAULT_SITE, df)]
+        for site, part in groups:
+            tail = part[list(CLIMATE_COLS)].to_numpy(dtype=np.float64)[-self.history:]
+            with self._lock:
+                self._buffers[site] = deque(tail, maxlen=self.history)
+
+    def observe(self, site: str, readings: dict) -> None:
+        row = np.array([readings[c] for c in CLIMATE_COLS], dtype=np.float64)
+        with self._lock:
+            self._buffers.setdefault(site, deque(maxlen=self.history)).append(row)
+
+    def features(self, site: str, date, readings: dict) -> np.ndarray:
+        today = np.array([readings[c] for c in CLIMATE_COLS], dtype=np.float64)
+        with self._lock:
+            past = list(self._buffers.get(site, ()))
+        if len(past) < self.history:
+            raise ValueError(f'site {site!r} needs {self.history} days of history, has {len(past)}')
+        series = np.vstack(past + [today])  # last row is the forecast day
+        values = dict(zip(CLIMATE_COLS, today))
+        for l in self.lags:
+            values.update(zip((f'{p}_lag_{l}' for p in CLIMATE_COLS.values()), series[-1 - l]))
+        for w in self.windows:
+            values.update(zip((f'{p}_roll_{w}' for p in CLIMATE_COLS.values()), series[-w:].mean(axis=0)))
+        date = pd.Timestamp(date)
+        values['month'] = date.month
+        values['doy_sin'] = np.sin(2*np.pi*date.dayofyear/365)
+        values['doy_cos'] = np.cos(2*np.pi*date.dayofyear/365)
+        return np.array([values[c] for c in self.schema['feature_cols']], dtype=np.float64)
+
+    def predict_batch(self, requests: List[dict], model: str = 'rf') -> np.ndarray:
+        X = np.vstack([self.features(r.get('site', DEFAULT_SITE), r['date'], r) for r in requests])
+        X = pd.DataFrame(X, columns=self.schema['feature_cols'])
+        return self.models[model].predict(X)
+
+    def predict(self, site: str, date, readings: dict, model: str = 'rf') -> float:
+        return float(self.predict_batch([{'site': site, 'date': date, **readings}], model=model)[0])
+
+
+class MicroBatcher:
+    # Collects concurrent requests for up to max_wait_ms (or max_batch items)
+    # and answers them with one model.predict call per model.
+    def __init__(self, forecaster: Forecaster, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.forecaster = forecaster
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, request: dict) -> Future:
+        fut: Future = Future()
+        self._queue.put((request, fut))
+        return fut
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            by_model: Dict[str, list] = {}
+            for req, fut in batch:
+                by_model.setdefault(req.get('model', 'rf'), []).append((req, fut))
+            for model, items in by_model.items():
+                self._answer(model, items)
+
+    def _answer(self, model: str, items: list) -> None:
+        try:
+            preds = self.forecaster.predict_batch([req for req, _ in items], model=model)
+        except Exception:
+            # One bad request must not fail the rest of the batch: retry one by one
+            for req, fut in items:
+                try:
+                    fut.set_result(float(self.forecaster.predict_batch([req], model=model)[0]))
+                except Exception as exc:  # noqa: BLE001
+                    fut.set_exception(exc)
+            return
+        for (_, fut), pred in zip(items, preds):
+            fut.set_result(float(pred))
+
+
+def make_handler(batcher: MicroBatcher, timeout: float = 5.0):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._reply(200, {'status': 'ok', 'version': batcher.forecaster.schema['version']})
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path == '/observe':
+                # Append a day of readings to the site's warm buffer
+                try:
+                    req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    batcher.forecaster.observe(req.get('site', DEFAULT_SITE), req)
+                except Exception as exc:  # noqa: BLE001
+                    self._reply(400, {'error': str(exc)})
+                    return
+                self._reply(200, {'status': 'ok'})
+                return
+            if self.path != '/predict':
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                eggs = batcher.submit(req).result(timeout=timeout)
+            except Exception as exc:  # noqa: BLE001
+                self._reply(400, {'error': str(exc)})
+                return
+            self._reply(200, {'site': req.get('site', DEFAULT_SITE), 'date': req['date'],
+                              'model': req.get('model', 'rf'), 'eggs': eggs})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve egg-index forecasts from the model registry')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--version', default='latest')
+    parser.add_argument('--history', type=Path, default=TIMESERIES_DIR,
+                        help='climate history (Parquet dataset) used to warm the per-site feature buffers')
+    args = parser.parse_args()
+
+    forecaster = Forecaster.from_registry(args.version)
+    if args.history.exists():
+        # Only the tail of each site's series is needed to warm the buffers
+        _, last = date_bounds(args.history)
+        start = last - pd.Timedelta(days=forecaster.history + 1)
+        forecaster.warm(read_timeseries(args.history, columns=['site', 'date', *CLIMATE_COLS], start=start))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(MicroBatcher(forecaster)))
+    print(f'Serving model {forecaster.schema["version"]} on http://{args.host}:{args.port}/predict')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
+import argparse
+import os
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+from typing import Callable, Optional, Sequence
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, r2_score
@@ -14,22 +17,29 @@ OUTPUT_DIR = Path('.')
 RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
 
+DEFAULT_LAGS = (7, 14, 21)
+DEFAULT_WINDOWS = (7, 14)
+DEFAULT_RF_PARAMS = {'n_estimators': 300, 'max_depth': 12}
 
-def synthesize_data(days: int = 900) -> pd.DataFrame:
+
+def synthesize_data(days: int = 900, seed: Optional[int] = None) -> pd.DataFrame:
+    # seed=None keeps drawing from the module-level global state; an explicit seed
+    # gives an independent, reproducible stream (used by the scenario runner)
+    rng = np.random if seed is None else np.random.RandomState(seed)
     dates = pd.date_range('2019-01-01', periods=days, freq='D')
     t = np.arange(days)
 
     # Climate generators (seasonal patterns + noise)
-    temp = 18 + 10*np.sin(2*np.pi*t/365) + np.random.normal(0, 1.2, days)
-    humidity = 60 + 20*np.sin(2*np.pi*(t-45)/365) + np.random.normal(0, 3.0, days)
-    rainfall = np.clip(np.random.gamma(shape=2.0, scale=2.5, size=days) * (0.6 + 0.4*np.sin(2*np.pi*(t-90)/365)), 0, None)
+    temp = 18 + 10*np.sin(2*np.pi*t/365) + rng.normal(0, 1.2, days)
+    humidity = 60 + 20*np.sin(2*np.pi*(t-45)/365) + rng.normal(0, 3.0, days)
+    rainfall = np.clip(rng.gamma(shape=2.0, scale=2.5, size=days) * (0.6 + 0.4*np.sin(2*np.pi*(t-90)/365)), 0, None)
 
     # Biological response: oviposition index (eggs) influenced by climate with lags
     # Eggs increase with temp (up to a point), high humidity, and rainfall from prior weeks
     base = 20 + 0.8*np.maximum(temp-20, 0) + 0.3*(humidity-50)
     lag7 = np.roll(rainfall, 7) * 0.9
     lag14 = np.roll(rainfall, 14) * 0.6
-    eggs = base + lag7 + lag14 + np.random.normal(0, 3.0, days)
+    eggs = base + lag7 + lag14 + rng.normal(0, 3.0, days)
     eggs = np.clip(eggs, 0, None)
 
     df = pd.DataFrame({
@@ -42,29 +52,82 @@ def synthesize_data(days: int = 900) -> pd.DataFrame:
     return df
 
 
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df = df.sort_values('date')
-    # Lags
-    for l in [7, 14, 21]:
-        df[f'rainfall_lag_{l}'] = df['rainfall'].shift(l)
-        df[f'temp_lag_{l}'] = df['temperature'].shift(l)
-        df[f'hum_lag_{l}'] = df['humidity'].shift(l)
-    # Rolling means
-    for w in [7, 14]:
-        df[f'rainfall_roll_{w}'] = df['rainfall'].rolling(w).mean()
-        df[f'temp_roll_{w}'] = df['temperature'].rolling(w).mean()
-        df[f'hum_roll_{w}'] = df['humidity'].rolling(w).mean()
-    # Seasonality (month, weekofyear)
-    df['month'] = df['date'].dt.month
-    df['doy_sin'] = np.sin(2*np.pi*df['date'].dt.dayofyear/365)
-    df['doy_cos'] = np.cos(2*np.pi*df['date'].dt.dayofyear/365)
-
-    df = df.dropna().reset_index(drop=True)
-    return df
-
-
-def train_evaluate(df_feat: pd.DataFrame):
+# Source column -> prefix used in the engineered feature names
+CLIMATE_COLS = {'rainfall': 'rainfall', 'temperature': 'temp', 'humidity': 'hum'}
+
+
+def feature_names(lags: Sequence[int] = DEFAULT_LAGS, windows: Sequence[int] = DEFAULT_WINDOWS) -> list:
+    names = [f'{p}_lag_{l}' for l in lags for p in CLIMATE_COLS.values()]
+    names += [f'{p}_roll_{w}' for w in windows for p in CLIMATE_COLS.values()]
+    return names + ['month', 'doy_sin', 'doy_cos']
+
+
+def engineer_features_multi(df: pd.DataFrame, site_col: Optional[str] = 'site',
+                            lags: Sequence[int] = DEFAULT_LAGS, windows: Sequence[int] = DEFAULT_WINDOWS,
+                            dtype=np.float64) -> pd.DataFrame:
+    # Long (site, date) frame -> features for every site at once. Each site is
+    # expected to be a contiguous daily series (as for the single-site version,
+    # lags/windows are counted in rows). All lag and rolling columns are written
+    # into one preallocated block instead of being appended column by column.
+    keys = [site_col, 'date'] if site_col else ['date']
+    df = df.sort_values(keys, kind='stable').reset_index(drop=True)
+    n = len(df)
+    values = df[list(CLIMATE_COLS)].to_numpy(dtype=np.float64)
+
+    # Row position inside its site: lags/windows reaching into the previous site are invalid
+    if site_col:
+        codes = pd.factorize(df[site_col])[0]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        pos = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    else:
+        pos = np.arange(n)
+
+    k = len(CLIMATE_COLS)
+    block = np.full((n, k * (len(lags) + len(windows))), np.nan, dtype=dtype)
+    col = 0
+    for l in lags:
+        if l < n:
+            valid = pos[l:] >= l
+            block[l:, col:col + k][valid] = values[:-l or None][valid]
+        col += k
+    for w in windows:
+        if w <= n:
+            # Exact per-window means over a strided view (no cumulative-sum drift)
+            means = np.lib.stride_tricks.sliding_window_view(values, w, axis=0).mean(axis=-1)
+            valid = pos[w - 1:] >= w - 1
+            block[w - 1:, col:col + k][valid] = means[valid]
+        col += k
+
+    dates = df['date'].dt
+    doy = dates.dayofyear.to_numpy()
+    names = feature_names(lags, windows)
+    features = {name: block[:, i] for i, name in enumerate(names[:-3])}
+    features['month'] = dates.month.to_numpy()
+    features['doy_sin'] = np.sin(2*np.pi*doy/365).astype(dtype)
+    features['doy_cos'] = np.cos(2*np.pi*doy/365).astype(dtype)
+
+    out = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
+    return out.dropna().reset_index(drop=True)
+
+
+def iter_features_by_site(source, site_col: str = 'site', sites_per_chunk: int = 500, **kwargs):
+    # Streaming mode: yields feature frames for a bounded number of sites at a time.
+    # `source` is either a long DataFrame or an iterable of DataFrames that each
+    # hold complete sites (e.g. the chunks written by a multi-site generator).
+    frames = [source] if isinstance(source, pd.DataFrame) else source
+    for frame in frames:
+        sites = frame[site_col].unique()
+        for i in range(0, len(sites), sites_per_chunk):
+            part = frame[frame[site_col].isin(sites[i:i + sites_per_chunk])]
+            yield engineer_features_multi(part, site_col=site_col, **kwargs)
+
+
+def engineer_features(df: pd.DataFrame, lags: Sequence[int] = DEFAULT_LAGS,
+                      windows: Sequence[int] = DEFAULT_WINDOWS) -> pd.DataFrame:
+    return engineer_features_multi(df, site_col=None, lags=lags, windows=windows)
+
+
+def train_evaluate(df_feat: pd.DataFrame, rf_params: Optional[dict] = None):
     # Time-based split (last 20% as test)
     n = len(df_feat)
     split = int(n * 0.8)
@@ -82,7 +145,8 @@ def train_evaluate(df_feat: pd.DataFrame):
     pred_lin = lin.predict(X_test)
 
     # RandomForest
-    rf = RandomForestRegressor(n_estimators=300, max_depth=12, random_state=RANDOM_SEED, n_jobs=-1)
+    params = {**DEFAULT_RF_PARAMS, 'random_state': RANDOM_SEED, 'n_jobs': -1, **(rf_params or {})}
+    rf = RandomForestRegressor(**params)
     rf.fit(X_train, y_train)
     pred_rf = rf.predict(X_test)
 
@@ -94,7 +158,14 @@ def train_evaluate(df_feat: pd.DataFrame):
     return (lin, rf), (pred_lin, pred_rf), metrics, (train, test, feature_cols)
 
 
-def plot_seasonality(df: pd.DataFrame, out_path: Path):
+def _finish_figure(show: bool) -> None:
+    # Headless callers (the Streamlit background job) must never block on plt.show()
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plot_seasonality(df: pd.DataFrame, out_path: Path, show: bool = True):
     plt.figure(figsize=(10, 6))
     monthly = df.set_index('date')['eggs'].resample('M').mean()
     plt.plot(monthly.index, monthly.values, color='#FF6B6B', linewidth=2.5)
@@ -104,10 +175,10 @@ def plot_seasonality(df: pd.DataFrame, out_path: Path):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure(show)
 
 
-def plot_pred_vs_actual(test: pd.DataFrame, preds: np.ndarray, out_path: Path, title: str):
+def plot_pred_vs_actual(test: pd.DataFrame, preds: np.ndarray, out_path: Path, title: str, show: bool = True):
     plt.figure(figsize=(12, 6))
     plt.plot(test['date'], test['eggs'], label='Actual', color='#4ECDC4', linewidth=2.5)
     plt.plot(test['date'], preds, label='Predicted', color='#FF6B6B', linewidth=2.0)
@@ -118,10 +189,10 @@ def plot_pred_vs_actual(test: pd.DataFrame, preds: np.ndarray, out_path: Path, t
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure(show)
 
 
-def plot_feature_importance(model: RandomForestRegressor, feature_names: list, out_path: Path):
+def plot_feature_importance(model: RandomForestRegressor, feature_names: list, out_path: Path, show: bool = True):
     imp = pd.Series(model.feature_importances_, index=feature_names).sort_values(ascending=False)[:20]
     plt.figure(figsize=(10, 8))
     sns.barplot(x=imp.values, y=imp.index, color='#96CEB4')
@@ -130,30 +201,70 @@ def plot_feature_importance(model: RandomForestRegressor, feature_names: list, o
     plt.ylabel('Feature')
     plt.tight_layout()
     plt.savefig(out_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure(show)
 
 
-def main():
+def _write_csv(df: pd.DataFrame, path: Path) -> None:
+    # Write-then-rename so readers (app.py) never see a half-written file
+    tmp = path.with_suffix('.tmp')
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def run_pipeline(show_plots: bool = True, on_stage: Optional[Callable[[str], None]] = None,
+                 export_csv: bool = False, search: bool = False) -> dict:
+    # Three independently published stages: data (fast) -> metrics + models -> plots.
+    # on_stage(name) is called as soon as each stage's outputs are on disk.
+    from storage import write_metrics, write_timeseries
+    notify = on_stage or (lambda stage: None)
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     df = synthesize_data()
-    df.to_csv(OUTPUT_DIR / 'mosquito_timeseries.csv', index=False)
+    write_timeseries(df, OUTPUT_DIR / 'mosquito_timeseries')
+    if export_csv:
+        _write_csv(df, OUTPUT_DIR / 'mosquito_timeseries.csv')
+    notify('data')
 
     df_feat = engineer_features(df)
-    (lin, rf), (pred_lin, pred_rf), metrics, (train, test, feature_cols) = train_evaluate(df_feat)
-
-    # Save metrics
-    metrics.to_csv(OUTPUT_DIR / 'model_metrics.csv', index=False)
+    rf_params = None
+    if search:
+        # Tune on the training window only so the held-out 20% stays unseen
+        from rf_search import successive_halving
+        rf_params, _ = successive_halving(df_feat.iloc[:int(len(df_feat) * 0.8)])
+    (lin, rf), (pred_lin, pred_rf), metrics, (train, test, feature_cols) = train_evaluate(df_feat, rf_params=rf_params)
+
+    # Save metrics and register the trained models with their feature schema
+    from model_service import save_models
+    version = save_models({'lin': lin, 'rf': rf}, feature_cols, metrics=metrics)
+    write_metrics(metrics, OUTPUT_DIR / 'model_metrics.parquet')
+    if export_csv:
+        _write_csv(metrics, OUTPUT_DIR / 'model_metrics.csv')
+    notify('metrics')
 
     # Plots
-    plot_seasonality(df, OUTPUT_DIR / 'seasonality_plot.png')
-    plot_pred_vs_actual(test[['date', 'eggs']], pred_lin, OUTPUT_DIR / 'pred_vs_actual_linear.png', 'Pred vs Actual - Linear Regression')
-    plot_pred_vs_actual(test[['date', 'eggs']], pred_rf, OUTPUT_DIR / 'pred_vs_actual_rf.png', 'Pred vs Actual - Random Forest')
-    plot_feature_importance(rf, feature_cols, OUTPUT_DIR / 'feature_importance.png')
+    plot_seasonality(df, OUTPUT_DIR / 'seasonality_plot.png', show=show_plots)
+    plot_pred_vs_actual(test[['date', 'eggs']], pred_lin, OUTPUT_DIR / 'pred_vs_actual_linear.png', 'Pred vs Actual - Linear Regression', show=show_plots)
+    plot_pred_vs_actual(test[['date', 'eggs']], pred_rf, OUTPUT_DIR / 'pred_vs_actual_rf.png', 'Pred vs Actual - Random Forest', show=show_plots)
+    plot_feature_importance(rf, feature_cols, OUTPUT_DIR / 'feature_importance.png', show=show_plots)
+    notify('plots')
+
+    return {'version': version, 'metrics': metrics, 'rf_params': rf_params}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthesize data, train models and save metrics and charts')
+    parser.add_argument('--csv', action='store_true', help='also export mosquito_timeseries.csv / model_metrics.csv')
+    parser.add_argument('--search', action='store_true', help='tune the RandomForest with successive halving first')
+    args = parser.parse_args()
+
+    result = run_pipeline(show_plots=True, export_csv=args.csv, search=args.search)
 
     print('✅ Modeling complete:')
-    print(' - mosquito_timeseries.csv')
-    print(' - model_metrics.csv')
+    print(' - mosquito_timeseries/ (Parquet, partitioned by site and year)')
+    print(' - model_metrics.parquet')
+    if args.csv:
+        print(' - mosquito_timeseries.csv, model_metrics.csv')
+    print(f" - models/{result['version']}/ (lin, rf, schema.json)")
     print(' - seasonality_plot.png')
     print(' - pred_vs_actual_linear.png')
     print(' - pred_vs_actual_rf.png')
@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+
+from backtest import make_folds
+from pasteur_modeling import OUTPUT_DIR, RANDOM_SEED, engineer_features, synthesize_data
+
+SEARCH_CACHE_DIR = OUTPUT_DIR / '.search_cache'
+SEARCH_CSV = OUTPUT_DIR / 'rf_search.csv'
+
+DEFAULT_SPACE = {
+    'max_depth': [6, 8, 12, 16, None],
+    'max_features': [1.0, 0.6, 0.33, 'sqrt'],
+    'min_samples_leaf': [1, 3, 5],
+}
+
+
+def data_fingerprint(df_feat: pd.DataFrame) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(df_feat, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def config_key(config: dict, n_estimators: int, n_folds: int, fingerprint: str) -> str:
+    payload = json.dumps([config, n_estimators, n_folds, fingerprint, RANDOM_SEED], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+_X: Optional[np.ndarray] = None
+_Y: Optional[np.ndarray] = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    # The training data is sent to each worker once, not with every task
+    global _X, _Y
+    _X, _Y = X, y
+
+
+def _cached(cache_path: Optional[Path]) -> Optional[dict]:
+    if cache_path is not None and cache_path.exists():
+        return {**json.loads(cache_path.read_text()), 'cached': True}
+    return None
+
+
+def _evaluate(args) -> dict:
+    config, n_estimators, n_folds, cache_path = args
+    X, y = _X, _Y
+    t0 = time.perf_counter()
+    maes = []
+    for tr0, tr1, te0, te1 in make_folds(len(X), n_folds=n_folds):
+        rf = RandomForestRegressor(n_estimators=n_estimators, random_state=RANDOM_SEED, n_jobs=1, **config)
+        rf.fit(X[tr0:tr1], y[tr0:tr1])
+        maes.append(mean_absolute_error(y[te0:te1], rf.predict(X[te0:te1])))
+    result = {'config': config, 'n_estimators': n_estimators, 'n_folds': n_folds,
+              'MAE': float(np.mean(maes)), 'MAE_std': float(np.std(maes)), 'fit_s': time.perf_counter() - t0}
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(result))
+        os.replace(tmp, cache_path)
+    return {**result, 'cached': False}
+
+
+def expand_space(space: Dict[str, Sequence]) -> List[dict]:
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def successive_halving(df_feat: pd.DataFrame, space: Optional[Dict[str, Sequence]] = None, min_trees: int = 25,
+                       max_trees: int = 400, min_folds: int = 2, max_folds: int = 6, eta: int = 3,
+                       max_workers: Optional[int] = None, cache_dir: Optional[Path] = SEARCH_CACHE_DIR
+                       ) -> Tuple[dict, pd.DataFrame]:
+    # Rung r scores the surviving candidates with min_trees * eta**r trees (the
+    # last rung with max_trees) on a fold count that grows linearly up to
+    # max_folds, then keeps the best 1/eta.
+    # Every (config, trees, folds, data) evaluation is cached on disk by hash.
+    target = 'eggs'
+    df_feat = df_feat.sort_values('date').reset_index(drop=True)
+    feature_cols = [c for c in df_feat.columns if c not in ['date', target]]
+    X = df_feat[feature_cols].to_numpy(dtype=np.float64)
+    y = df_feat[target].to_numpy(dtype=np.float64)
+    fingerprint = data_fingerprint(df_feat)
+
+    candidates = expand_space(space or DEFAULT_SPACE)
+    n_rungs = max(1, int(math.floor(math.log(max_trees / min_trees, eta))) + 1)
+    history = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        for rung in range(n_rungs):
+            trees = max_trees if rung == n_rungs - 1 else min(max_trees, min_trees * eta ** rung)
+            folds = min_folds + round((max_folds - min_folds) * rung / max(1, n_rungs - 1))
+            tasks = [(c, trees, folds,
+                      None if cache_dir is None else cache_dir / f'{config_key(c, trees, folds, fingerprint)}.json')
+                     for c in candidates]
+            # Cache hits are answered here; only the missing evaluations go to the pool
+            results = [_cached(task[3]) for task in tasks]
+            missing = [i for i, res in enumerate(results) if res is None]
+            for i, res in zip(missing, pool.map(_evaluate, [tasks[i] for i in missing])):
+                results[i] = res
+            for res in results:
+                history.append({'rung': rung, **res['config'], 'n_estimators': trees, 'n_folds': folds,
+                                'MAE': res['MAE'], 'MAE_std': res['MAE_std'], 'fit_s': res['fit_s'],
+                                'cached': res['cached']})
+            ranked = sorted(zip(results, candidates), key=lambda rc: rc[0]['MAE'])
+            if rung == n_rungs - 1 or len(ranked) == 1:
+                best_result, best = ranked[0]
+                break
+            candidates = [c for _, c in ranked[:max(1, len(ranked) // eta)]]
+
+    best_params = {**best, 'n_estimators': best_result['n_estimators']}
+    return best_params, pd.DataFrame(history)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Successive-halving search over RandomForest hyperparameters')
+    parser.add_argument('--days', type=int, default=900)
+    parser.add_argument('--min-trees', type=int, default=25)
+    parser.add_argument('--max-trees', type=int, default=400)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--out', type=Path, default=SEARCH_CSV)
+    args = parser.parse_args()
+
+    df_feat = engineer_features(synthesize_data(days=args.days, seed=RANDOM_SEED))
+    t0 = time.perf_counter()
+    best, history = successive_halving(df_feat, min_trees=args.min_trees, max_trees=args.max_trees, eta=args.eta,
+                                       max_workers=args.workers, cache_dir=None if args.no_cache else SEARCH_CACHE_DIR)
+    history.to_csv(args.out, index=False)
+
+    print(f'✅ Search complete in {time.perf_counter() - t0:.1f}s ({len(history)} evaluations, '
+          f'{int(history["cached"].sum())} from cache)')
+    print(f' - best: {best}')
+    print(f' - {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from pasteur_modeling import (
+    DEFAULT_LAGS,
+    DEFAULT_RF_PARAMS,
+    DEFAULT_WINDOWS,
+    OUTPUT_DIR,
+    engineer_features,
+    synthesize_data,
+    train_evaluate,
+)
+
+CACHE_DIR = OUTPUT_DIR / '.scenario_cache'
+SCENARIO_METRICS_CSV = OUTPUT_DIR / 'scenario_metrics.csv'
+
+# Default grid: 3 seeds x 2 lengths x 2 lag sets x 2 window sets x 2 forests = 48 runs
+DEFAULT_GRID = {
+    'seed': [42, 7, 2021],
+    'days': [900, 1460],
+    'lags': [DEFAULT_LAGS, (7, 14)],
+    'windows': [DEFAULT_WINDOWS, (7, 14, 28)],
+    'rf_params': [DEFAULT_RF_PARAMS, {'n_estimators': 150, 'max_depth': 8}],
+}
+
+
+def _key(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=list).encode()).hexdigest()[:16]
+
+
+def _read_or_build(path: Path, build) -> pd.DataFrame:
+    if path.exists():
+        return pd.read_pickle(path)
+    df = build()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent workers never see a half-written file
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    df.to_pickle(tmp)
+    os.replace(tmp, path)
+    return df
+
+
+@lru_cache(maxsize=32)
+def cached_data(seed: int, days: int) -> pd.DataFrame:
+    path = CACHE_DIR / f'data_{_key(seed, days)}.pkl'
+    return _read_or_build(path, lambda: synthesize_data(days=days, seed=seed))
+
+
+@lru_cache(maxsize=64)
+def cached_features(seed: int, days: int, lags: Tuple[int, ...], windows: Tuple[int, ...]) -> pd.DataFrame:
+    path = CACHE_DIR / f'feat_{_key(seed, days, lags, windows)}.pkl'
+    return _read_or_build(path, lambda: engineer_features(cached_data(seed, days), lags=lags, windows=windows))
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[dict]:
+    grid = {**DEFAULT_GRID, **grid}
+    keys = list(DEFAULT_GRID)
+    scenarios = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        sc = dict(zip(keys, values))
+        sc['lags'] = tuple(sorted(sc['lags']))
+        sc['windows'] = tuple(sorted(sc['windows']))
+        scenarios.append(sc)
+    return scenarios
+
+
+def _run_group(feature_key: Tuple, rf_params_list: List[dict]) -> List[dict]:
+    # One task per feature set: features are built (or loaded) once and shared by
+    # every model configuration that uses them
+    seed, days, lags, windows = feature_key
+    t0 = time.perf_counter()
+    df_feat = cached_features(seed, days, lags, windows)
+    feat_s = time.perf_counter() - t0
+    rows = []
+    for rf_params in rf_params_list:
+        t1 = time.perf_counter()
+        # Single-threaded forests: the process pool already uses every core
+        params = {'n_jobs': 1, 'random_state': seed, **rf_params}
+        _, _, metrics, _ = train_evaluate(df_feat, rf_params=params)
+        fit_s = time.perf_counter() - t1
+        for rec in metrics.to_dict('records'):
+            rows.append({
+                'seed': seed,
+                'days': days,
+                'lags': ','.join(map(str, lags)),
+                'windows': ','.join(map(str, windows)),
+                'n_estimators': params.get('n_estimators'),
+                'max_depth': params.get('max_depth'),
+                'rows': len(df_feat),
+                'features_s': round(feat_s, 3),
+                'fit_s': round(fit_s, 3),
+                **rec,
+            })
+    return rows
+
+
+def run_scenarios(scenarios: Iterable[dict], max_workers: Optional[int] = None) -> pd.DataFrame:
+    groups: Dict[Tuple, List[dict]] = {}
+    for sc in scenarios:
+        groups.setdefault((sc['seed'], sc['days'], sc['lags'], sc['windows']), []).append(sc['rf_params'])
+
+    rows: List[dict] = []
+    if max_workers == 1:
+        for key, params in groups.items():
+            rows.extend(_run_group(key, params))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_run_group, key, params) for key, params in groups.items()]
+            for fut in as_completed(futures):
+                rows.extend(fut.result())
+
+    metrics = pd.DataFrame(rows)
+    if not metrics.empty:
+        metrics = metrics.sort_values(['seed', 'days', 'lags', 'windows', 'n_estimators', 'max_depth', 'model'])
+        metrics = metrics.reset_index(drop=True)
+    return metrics
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(',') if x]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run a grid of Pasteur modeling scenarios in parallel')
+    parser.add_argument('--seeds', type=_int_list, help='e.g. 42,7,2021')
+    parser.add_argument('--days', type=_int_list, help='e.g. 900,1460')
+    parser.add_argument('--lags', nargs='+', type=_int_list, help='lag sets, e.g. 7,14,21 7,14')
+    parser.add_argument('--windows', nargs='+', type=_int_list, help='window sets, e.g. 7,14 7,14,28')
+    parser.add_argument('--trees', type=_int_list, help='n_estimators values')
+    parser.add_argument('--depths', type=_int_list, help='max_depth values')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', type=Path, default=SCENARIO_METRICS_CSV)
+    args = parser.parse_args()
+
+    grid: Dict[str, Sequence] = {}
+    if args.seeds:
+        grid['seed'] = args.seeds
+    if args.days:
+        grid['days'] = args.days
+    if args.lags:
+        grid['lags'] = args.lags
+    if args.windows:
+        grid['windows'] = args.windows
+    if args.trees or args.depths:
+        trees = args.trees or [DEFAULT_RF_PARAMS['n_estimators']]
+        depths = args.depths or [DEFAULT_RF_PARAMS['max_depth']]
+        grid['rf_params'] = [{'n_estimators': n, 'max_depth': d} for n, d in itertools.product(trees, depths)]
+
+    scenarios = expand_grid(grid)
+    t0 = time.perf_counter()
+    metrics = run_scenarios(scenarios, max_workers=args.workers)
+    metrics.to_csv(args.out, index=False)
+
+    print(f'✅ {len(scenarios)} scenarios in {time.perf_counter() - t0:.1f}s')
+    print(f' - {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from pasteur_modeling import RANDOM_SEED
+from storage import OUTPUT_DIR, write_timeseries_chunks
+
+SIM_DIR = OUTPUT_DIR / 'simulated_sites'
+N_FACTORS = 16        # regional weather systems shared by nearby sites
+LENGTH_SCALE = 0.25   # correlation length on the unit square
+SPATIAL_SHARE = 0.7   # share of daily noise variance explained by regional factors
+BURN_IN = 14          # extra leading days so rainfall lags need no wrap-around
+
+
+def _loadings(coords: np.ndarray, anchors: np.ndarray) -> np.ndarray:
+    # RBF weights to each regional factor, normalised to unit variance per site
+    d2 = ((coords[:, None, :] - anchors[None, :, :]) ** 2).sum(-1)
+    w = np.exp(-d2 / (2 * LENGTH_SCALE ** 2))
+    return w / np.linalg.norm(w, axis=1, keepdims=True)
+
+
+def synthesize_sites(n_sites: int, days: int = 900, seed: int = RANDOM_SEED, chunk_sites: int = 200,
+                     start: str = '2019-01-01', dtype=np.float32) -> Iterator[pd.DataFrame]:
+    # Yields long (site, date) frames for chunk_sites sites at a time. Every site
+    # shares the seasonal base of synthesize_data(); day-to-day anomalies are a
+    # mix of regional factors (so nearby sites co-vary) and site-level noise.
+    # Each chunk has its own child seed, so output does not depend on how many
+    # chunks were consumed before it.
+    n_chunks = -(-n_sites // chunk_sites)
+    shared_ss, *chunk_ss = np.random.SeedSequence(seed).spawn(n_chunks + 1)
+    shared = np.random.default_rng(shared_ss)
+    total = days + BURN_IN
+    anchors = shared.uniform(0, 1, size=(N_FACTORS, 2))
+    factors = shared.standard_normal(size=(3, N_FACTORS, total))  # temperature, humidity, rainfall
+    t = np.arange(-BURN_IN, days)
+    dates = pd.date_range(start, periods=days, freq='D')
+    a, b = np.sqrt(SPATIAL_SHARE), np.sqrt(1 - SPATIAL_SHARE)
+
+    for c in range(n_chunks):
+        rng = np.random.default_rng(chunk_ss[c])
+        lo, hi = c * chunk_sites, min(n_sites, (c + 1) * chunk_sites)
+        m = hi - lo
+        coords = rng.uniform(0, 1, size=(m, 2))
+        load = _loadings(coords, anchors)
+
+        def anomaly(k: int) -> np.ndarray:
+            return a * (load @ factors[k]) + b * rng.standard_normal(size=(m, total))
+
+        # Site climate offsets: warmer/drier towards the south (y=0), small phase shifts
+        lat = coords[:, 1:2]
+        phase = rng.normal(0, 5, size=(m, 1))
+        season = np.sin(2*np.pi*(t - phase)/365)
+        temp = 18 + 4*(0.5 - lat) + 10*season + 1.2*anomaly(0)
+        humidity = 60 + 8*(lat - 0.5) + 20*np.sin(2*np.pi*(t - 45 - phase)/365) + 3.0*anomaly(1)
+        rain_season = 0.6 + 0.4*np.sin(2*np.pi*(t - 90 - phase)/365)
+        rainfall = rng.gamma(shape=2.0, scale=2.5, size=(m, total)) * rain_season * np.exp(0.25*anomaly(2) - 0.03)
+        rainfall = np.clip(rainfall, 0, None)
+
+        base = 20 + 0.8*np.maximum(temp - 20, 0) + 0.3*(humidity - 50)
+        eggs = (base[:, BURN_IN:] + 0.9*rainfall[:, BURN_IN - 7:-7] + 0.6*rainfall[:, :-BURN_IN]
+                + rng.normal(0, 3.0, size=(m, days)))
+        eggs = np.clip(eggs, 0, None)
+
+        yield pd.DataFrame({
+            'site': np.repeat([f'site_{i:05d}' for i in range(lo, hi)], days),
+            'date': np.tile(dates.values, m),
+            'temperature': temp[:, BURN_IN:].astype(dtype).ravel(),
+            'humidity': humidity[:, BURN_IN:].astype(dtype).ravel(),
+            'rainfall': rainfall[:, BURN_IN:].astype(dtype).ravel(),
+            'eggs': eggs.astype(dtype).ravel(),
+        })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Simulate N sites x D days of climate and oviposition data')
+    parser.add_argument('--sites', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=900)
+    parser.add_argument('--chunk-sites', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--out', type=Path, default=SIM_DIR)
+    args = parser.parse_args()
+
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    t0 = time.perf_counter()
+    write_timeseries_chunks(counted(synthesize_sites(args.sites, args.days, args.seed, args.chunk_sites)), args.out)
+    elapsed = time.perf_counter() - t0
+
+    print(f'✅ Simulated {args.sites:,} sites x {args.days:,} days = {rows:,} rows in {elapsed:.1f}s '
+          f'({rows / elapsed:,.0f} rows/s)')
+    print(f' - {args.out}/')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+OUTPUT_DIR = Path('.')
+TIMESERIES_DIR = OUTPUT_DIR / 'mosquito_timeseries'
+METRICS_PARQUET = OUTPUT_DIR / 'model_metrics.parquet'
+DEFAULT_SITE = 'default'
+COMPRESSION = 'zstd'
+
+PARTITIONING = ds.partitioning(pa.schema([('site', pa.string()), ('year', pa.int16())]), flavor='hive')
+
+
+def _swap_into_place(tmp: Path, dest: Path) -> None:
+    # Two renames, not an atomic swap: readers see the previous complete dataset or
+    # the new one, except for the instant between the renames when dest is missing
+    # (app.py then reports the data as not available). A .old left by a crash
+    # between the renames is removed first.
+    old = dest.with_name(dest.name + '.old')
+    shutil.rmtree(old, ignore_errors=True)
+    if dest.exists():
+        os.replace(dest, old)
+    os.replace(tmp, dest)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _partitioned_table(df: pd.DataFrame, site_col: str) -> pa.Table:
+    df = df.sort_values([c for c in (site_col, 'date') if c in df.columns])
+    site = df[site_col].astype(str) if site_col in df.columns else DEFAULT_SITE
+    df = df.drop(columns=[site_col], errors='ignore').assign(site=site, year=df['date'].dt.year.astype('int16'))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_timeseries_chunks(chunks: Iterable[pd.DataFrame], root: Path = TIMESERIES_DIR,
+                            site_col: str = 'site') -> Path:
+    # Hive-partitioned Parquet (site=.../year=.../part-<chunk>-0.parquet), zstd-compressed.
+    # Chunks are written one at a time, so memory is bounded by the largest chunk.
+    # Single-site frames are stored under site=default.
+    tmp = root.with_name(root.name + '.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    options = ds.ParquetFileFormat().make_write_options(compression=COMPRESSION)
+    for i, df in enumerate(chunks):
+        table = _partitioned_table(df, site_col)
+        n_partitions = len(pc.unique(pc.binary_join_element_wise(
+            table['site'], pc.cast(table['year'], pa.string()), '/')))
+        ds.write_dataset(
+            table, tmp, format='parquet', partitioning=PARTITIONING, file_options=options,
+            basename_template=f'part-{i}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore',
+            max_partitions=max(1024, n_partitions), max_rows_per_group=64 * 1024,
+        )
+    _swap_into_place(tmp, root)
+    return root
+
+
+def write_timeseries(df: pd.DataFrame, root: Path = TIMESERIES_DIR, site_col: str = 'site') -> Path:
+    return write_timeseries_chunks([df], root, site_col)
+
+
+def read_timeseries(root: Path = TIMESERIES_DIR, columns: Optional[Sequence[str]] = None, start=None, end=None,
+                    sites: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    # Partition filters (site, year) prune whole files; the date filter is pushed
+    # down to Parquet row-group statistics, so only the requested slice is decoded.
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    flt = None
+
+    def _and(expr):
+        return expr if flt is None else flt & expr
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        flt = _and((ds.field('year') >= start.year) & (ds.field('date') >= start))
+    if end is not None:
+        end = pd.Timestamp(end)
+        flt = _and((ds.field('year') <= end.year) & (ds.field('date') <= end))
+    if sites is not None:
+        flt = _and(ds.field('site').isin([str(s) for s in sites]))
+    df = dataset.to_table(columns=list(columns) if columns else None, filter=flt).to_pandas()
+    if 'date' in df.columns:
+        df = df.sort_values([c for c in ('site', 'date') if c in df.columns], kind='stable')
+    return df.reset_index(drop=True)
+
+
+def date_bounds(root: Path = TIMESERIES_DIR):
+    # From the row-group statistics in the file footers; the date column itself is
+    # only read for files written without statistics
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    lows, highs = [], []
+    for fragment in dataset.get_fragments():
+        fragment.ensure_complete_metadata()
+        stats = [rg.statistics.get('date') for rg in fragment.row_groups]
+        if stats and all(s and s.get('min') is not None for s in stats):
+            lows += [s['min'] for s in stats]
+            highs += [s['max'] for s in stats]
+        else:
+            bounds = pc.min_max(fragment.to_table(columns=['date'])['date']).as_py()
+            if bounds['min'] is not None:
+                lows.append(bounds['min'])
+                highs.append(bounds['max'])
+    return pd.Timestamp(min(lows)), pd.Timestamp(max(highs))
+
+
+def write_metrics(metrics: pd.DataFrame, path: Path = METRICS_PARQUET) -> Path:
+    tmp = path.with_suffix('.tmp')
+    pq.write_table(pa.Table.from_pandas(metrics, preserve_index=False), tmp, compression=COMPRESSION)
+    os.replace(tmp, path)
+    return path
+
+
+def read_metrics(path: Path = METRICS_PARQUET) -> pd.DataFrame:
+    return pq.read_table(path).to_pandas()
@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from isbank_cube import SegmentCube, cube_file
+from scoring_engine import INPUT_COLUMNS, SEGMENTS, generate_customers, missing_amounts, score_customers
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except Exception:
+    HAVE_PYARROW = False
+
+CHUNK_ROWS = 500_000
+
+
+def _is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in ('.parquet', '.pq')
+
+
+def iter_chunks(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # Fixed-size chunks of the customer file; only one chunk per reader is in memory
+    if _is_parquet(path):
+        if not HAVE_PYARROW:
+            raise RuntimeError('pyarrow is required to read Parquet input')
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, float_precision='round_trip')
+
+
+def _score_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    # Scored rows and the number of rows dropped for a missing amount (the service
+    # answers 400 for those; a file run keeps going and reports the count)
+    missing = [c for c in INPUT_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f'Customer file is missing columns: {missing}')
+    bad = missing_amounts(chunk)
+    if bad.any():
+        chunk = chunk[~bad]
+    return score_customers(chunk, categorical=True), int(bad.sum())
+
+
+class _Writer:
+    # Appends scored chunks to CSV or Parquet (by suffix) under a temporary name;
+    # the file is moved into place only once every chunk is written
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp = path.with_name(path.name + '.tmp')
+        self.parquet = _is_parquet(path)
+        self.writer = None
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.parquet:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.tmp, table.schema, compression='zstd')
+            self.writer.write_table(table)
+        else:
+            chunk.to_csv(self.tmp, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        if self.tmp.exists():
+            os.replace(self.tmp, self.path)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def score_file(input_path: str, output_path: str, chunk_rows: int = CHUNK_ROWS, workers: Optional[int] = None,
+               progress: bool = True, cube_path: Optional[str] = None) -> Dict:
+    # Chunks are scored across a process pool and written in input order; at most
+    # 2 × workers chunks are in flight, so memory does not grow with the file.
+    # With cube_path the scored customers are added to that segment cube (created
+    # if missing), so a portfolio can be extended file by file. The cube records the
+    # SHA-256 of every file it took in; a file already counted is scored but not added again.
+    input_path, output_path = Path(input_path), Path(output_path)
+    workers = workers or os.cpu_count() or 1
+    writer = _Writer(output_path)
+    segments: Counter = Counter()
+    clv_total = 0.0
+    rejected = 0
+    cube, digest, cube_added = None, None, False
+    if cube_path:
+        cube_path = cube_file(cube_path)
+        cube = SegmentCube.load(cube_path) if cube_path.exists() else SegmentCube()
+        digest = file_digest(input_path)
+        cube_added = digest not in cube.sources
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+
+            def drain_one() -> None:
+                nonlocal clv_total, rejected
+                scored, dropped = pending.popleft().result()
+                rejected += dropped
+                segments.update(scored['Segment'].value_counts().to_dict())
+                clv_total += float(scored['CustomerLifetimeValue'].sum())
+                writer.write(scored)
+                if cube_added:
+                    cube.update(scored)
+                if progress:
+                    elapsed = time.perf_counter() - t0
+                    print(f'   {writer.rows:>12,} clients  {elapsed:7.1f}s  {writer.rows / elapsed:>12,.0f} clients/s')
+
+            for chunk in iter_chunks(input_path, chunk_rows):
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    drain_one()
+            while pending:
+                drain_one()
+    except BaseException:
+        if writer.writer is not None:
+            writer.writer.close()
+        writer.tmp.unlink(missing_ok=True)
+        raise
+    writer.close()
+    if cube_added:
+        cube.sources.append(digest)
+        cube.save(cube_path)
+    elapsed = time.perf_counter() - t0
+    return {
+        'rows': writer.rows,
+        'rejected': rejected,
+        'seconds': round(elapsed, 2),
+        'rows_per_s': round(writer.rows / elapsed) if elapsed > 0 else None,
+        'segments': {s: int(segments.get(s, 0)) for s in SEGMENTS},
+        'clv_total': round(clv_total, 2),
+        'output': str(output_path),
+        'cube': str(cube_path) if cube is not None else None,
+        'cube_added': cube_added,
+        'cube_customers': cube.n if cube is not None else None,
+    }
+
+
+def write_demo_file(path: str, n: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> None:
+    # Generated portfolio of n customers in the input format, written chunk by chunk
+    writer = _Writer(Path(path))
+    for start in range(0, n, chunk_rows):
+        chunk = generate_customers(min(chunk_rows, n - start), seed=seed + start, id_offset=start)
+        writer.write(chunk.assign(EducationLevel=chunk['EducationLevel'].astype(str)))
+    writer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Score a customer file (CSV or Parquet) in chunks')
+    parser.add_argument('input', help='customer file with ' + ', '.join(INPUT_COLUMNS))
+    parser.add_argument('output', help='scored output (.csv or .parquet)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--demo-rows', type=int, default=None,
+                        help='first write a generated portfolio of this many customers to INPUT')
+    parser.add_argument('--cube', help='segment cube (.npz, see isbank_cube.py) updated with the scored customers')
+    args = parser.parse_args()
+
+    if args.demo_rows:
+        write_demo_file(args.input, args.demo_rows, chunk_rows=args.chunk_rows)
+    stats = score_file(args.input, args.output, chunk_rows=args.chunk_rows, workers=args.workers,
+                       cube_path=args.cube)
+    print('✅ Scoring terminé:')
+    print(f" - Fichier: {stats['output']}")
+    print(f" - Clients: {stats['rows']:,} en {stats['seconds']}s ({stats['rows_per_s']:,} clients/s)")
+    print(f" - CLV total: {stats['clv_total']:,.0f} TL")
+    if stats['rejected']:
+        print(f" - ⚠️ {stats['rejected']:,} clients ignorés (montant manquant : Income, CurrentBalance, "
+              f"MonthlyTransactions ou InvestmentAmount)")
+    if args.cube:
+        note = '' if stats['cube_added'] else ' (fichier déjà dans le cube, non ajouté)'
+        print(f" - Cube {stats['cube']}: {stats['cube_customers']:,} clients{note}")
+    for segment, count in stats['segments'].items():
+        print(f'   • {segment}: {count:,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from scoring_engine import EDUCATION_LEVELS, POTENTIAL_LEVELS, SEGMENTS, generate_customers, score_customers
+
+AGE_BINS = [25, 35, 45, 55, 70]  # pd.cut bins of the dashboards: (25, 35], (35, 45], ...
+AGE_BANDS = ['25-35', '36-45', '46-55', '56-70', 'hors tranche']
+OTHER = 'Autre'  # cell of the values a dimension does not know (unexpected label, missing)
+DIMENSIONS = {
+    'Segment': list(SEGMENTS) + [OTHER],
+    'PotentialLevel': list(POTENTIAL_LEVELS) + [OTHER],
+    'AgeBand': AGE_BANDS,
+    'EducationLevel': list(EDUCATION_LEVELS) + [OTHER],
+}
+MEASURES = ['TotalScore', 'IncomeScore', 'BalanceScore', 'EducationScore', 'ActivityScore', 'CustomerLifetimeValue']
+
+
+def _label_codes(values: pd.Series, labels: List[str]) -> np.ndarray:
+    # Position of each value in labels; unknown and missing values go to the OTHER
+    # cell, never to a real segment or level
+    other = labels.index(OTHER)
+    lookup = {label: i for i, label in enumerate(labels)}
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        table = np.array([lookup.get(c, other) for c in values.cat.categories] + [other])
+        return table[values.cat.codes.to_numpy()]
+    codes, uniques = pd.factorize(values)
+    table = np.array([lookup.get(u, other) for u in uniques] + [other])
+    return table[codes]
+
+
+def cube_file(path: Union[str, Path]) -> Path:
+    # np.savez_compressed appends .npz to any other name; load and exists() must use the same file
+    path = Path(path)
+    return path if path.name.endswith('.npz') else path.with_name(path.name + '.npz')
+
+
+def age_band_codes(age) -> np.ndarray:
+    age = np.asarray(age, dtype=float)
+    code = np.searchsorted(AGE_BINS, age, side='left') - 1
+    outside = (code < 0) | (code >= len(AGE_BINS) - 1) | np.isnan(age)
+    return np.where(outside, len(AGE_BANDS) - 1, code)
+
+
+class SegmentCube:
+    # Dense cube over (Segment, PotentialLevel, AgeBand, EducationLevel) holding, per
+    # cell, the customer count and the sum and sum of squares of each measure. Means
+    # and standard deviations of any slice or roll-up come from these in O(cells);
+    # update() is O(batch) and cubes of separate batches or workers add up.
+    # `sources` lists the input files already counted (see batch_scoring.py).
+    def __init__(self):
+        self.shape = tuple(len(v) for v in DIMENSIONS.values())
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.sums = np.zeros(self.shape + (len(MEASURES),))
+        self.sumsq = np.zeros(self.shape + (len(MEASURES),))
+        self.sources: List[str] = []
+
+    @property
+    def n(self) -> int:
+        return int(self.count.sum())
+
+    def update(self, scored: pd.DataFrame) -> 'SegmentCube':
+        if scored.empty:
+            return self
+        codes = [
+            _label_codes(scored['Segment'], DIMENSIONS['Segment']),
+            _label_codes(scored['PotentialLevel'], DIMENSIONS['PotentialLevel']),
+            age_band_codes(scored['Age']),
+            _label_codes(scored['EducationLevel'], DIMENSIONS['EducationLevel']),
+        ]
+        cell = np.ravel_multi_index(codes, self.shape)
+        size = self.count.size
+        self.count += np.bincount(cell, minlength=size).reshape(self.shape)
+        for m, measure in enumerate(MEASURES):
+            values = scored[measure].to_numpy(dtype=float)
+            self.sums[..., m] += np.bincount(cell, weights=values, minlength=size).reshape(self.shape)
+            self.sumsq[..., m] += np.bincount(cell, weights=values * values, minlength=size).reshape(self.shape)
+        return self
+
+    def merge(self, other: 'SegmentCube') -> 'SegmentCube':
+        self.count += other.count
+        self.sums += other.sums
+        self.sumsq += other.sumsq
+        self.sources += [s for s in other.sources if s not in self.sources]
+        return self
+
+    def _index(self, filters: Dict[str, Union[str, List[str]]]) -> tuple:
+        unknown = set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f'Unknown cube dimensions: {sorted(unknown)}; available: {list(DIMENSIONS)}')
+        return np.ix_(*[np.arange(len(labels))[self._dim_index(dim, filters)] for dim, labels in DIMENSIONS.items()])
+
+    def stats(self, by: Union[str, List[str], None] = None, **filters) -> pd.DataFrame:
+        # count, mean_<measure>, std_<measure> (ddof=1, as pandas) per group of `by`,
+        # over the cells selected by filters, e.g. stats('AgeBand', Segment=['High Potential'])
+        by = [by] if isinstance(by, str) else list(by or [])
+        ix = self._index(filters)
+        keep = tuple(i for i, dim in enumerate(DIMENSIONS) if dim in by)
+        drop = tuple(i for i in range(len(self.shape)) if i not in keep)
+        count = self.count[ix].sum(axis=drop)
+        sums = self.sums[ix].sum(axis=drop)
+        sumsq = self.sumsq[ix].sum(axis=drop)
+
+        dims = [d for d in DIMENSIONS if d in by]
+        labels = [[DIMENSIONS[d][j] for j in np.arange(len(DIMENSIONS[d]))[self._dim_index(d, filters)]]
+                  for d in dims]
+        index = pd.MultiIndex.from_product(labels, names=dims) if dims else pd.Index(['total'])
+        out = pd.DataFrame({'count': np.ravel(count)}, index=index)
+        n = np.ravel(count).astype(float)
+        sums, sumsq = sums.reshape(-1, len(MEASURES)), sumsq.reshape(-1, len(MEASURES))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for m, measure in enumerate(MEASURES):
+                mean = sums[:, m] / n
+                var = (sumsq[:, m] - sums[:, m] * mean) / (n - 1)
+                out[f'mean_{measure}'] = np.where(n > 0, mean, np.nan)
+                out[f'std_{measure}'] = np.where(n > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+        if len(dims) == 1:
+            out.index = out.index.get_level_values(0)
+        return out
+
+    @staticmethod
+    def _dim_index(dim: str, filters: Dict) -> Union[slice, List[int]]:
+        wanted = filters.get(dim)
+        if wanted is None:
+            return slice(None)
+        wanted = [wanted] if isinstance(wanted, str) else wanted
+        return [DIMENSIONS[dim].index(w) for w in wanted]
+
+    def save(self, path: Union[str, Path]) -> None:
+        np.savez_compressed(cube_file(path), count=self.count, sums=self.sums, sumsq=self.sumsq,
+                            sources=np.array(self.sources, dtype=str))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'SegmentCube':
+        cube = cls()
+        with np.load(cube_file(path)) as data:
+            count, sums, sumsq = data['count'], data['sums'], data['sumsq']
+            cube.sources = data['sources'].tolist() if 'sources' in data.files else []
+        if count.shape != cube.shape:
+            # Cubes saved before the OTHER cells existed: labels were appended at the
+            # end of each dimension, so the old cells keep their positions
+            if count.ndim != len(cube.shape) or any(o > n for o, n in zip(count.shape, cube.shape)):
+                raise ValueError(f'{path}: cube shape {count.shape} does not match {cube.shape}')
+            pad = [(0, n - o) for o, n in zip(count.shape, cube.shape)]
+            count, sums, sumsq = np.pad(count, pad), np.pad(sums, pad + [(0, 0)]), np.pad(sumsq, pad + [(0, 0)])
+        cube.count, cube.sums, cube.sumsq = count, sums, sumsq
+        return cube
+
+
+def build_cube(batches, cube: Optional[SegmentCube] = None) -> SegmentCube:
+    cube = cube or SegmentCube()
+    for batch in batches:
+        cube.update(batch)
+    return cube
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Build the ISBANK segment cube for a generated portfolio')
+    parser.add_argument('--customers', type=int, default=10_000_000)
+    parser.add_argument('--batch', type=int, default=1_000_000)
+    parser.add_argument('--out', default='isbank_cube.npz')
+    args = parser.parse_args()
+
+    cube, t_score, t_cube = SegmentCube(), 0.0, 0.0
+    for start in range(0, args.customers, args.batch):
+        t0 = time.perf_counter()
+        batch = score_customers(generate_customers(min(args.batch, args.customers - start), seed=start),
+                                categorical=True)
+        t1 = time.perf_counter()
+        cube.update(batch)
+        t_score, t_cube = t_score + t1 - t0, t_cube + time.perf_counter() - t1
+    cube.save(args.out)
+
+    t0 = time.perf_counter()
+    by_segment = cube.stats('Segment')
+    by_age_edu = cube.stats(['AgeBand', 'EducationLevel'], Segment=['High Potential', 'Ultra High Potential'])
+    t_query = time.perf_counter() - t0
+    print(f'✅ Cube de {cube.n:,} clients: {cube_file(args.out)}')
+    print(f' - Génération + scoring: {t_score:.1f}s, mise à jour du cube: {t_cube:.1f}s, '
+          f'deux requêtes: {t_query * 1000:.1f} ms')
+    print(by_segment[['count', 'mean_TotalScore', 'mean_CustomerLifetimeValue',
+                      'std_CustomerLifetimeValue']].round(1).to_string())
+    print(by_age_edu[['count', 'mean_CustomerLifetimeValue']].round(1).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+
+from isbank_cube import SegmentCube
+from scoring_engine import SEGMENTS, generate_customers, legacy_customers, score_customers
+
+SCORE_COMPONENTS = ['IncomeScore', 'BalanceScore', 'EducationScore', 'ActivityScore']
+COMPONENT_NAMES = ['Revenu', 'Solde', 'Éducation', 'Activité']
+AGE_LABELS = ['25-35', '36-45', '46-55', '56-70']
+SCATTER_MAX_POINTS = 5000  # larger portfolios plot a fixed random sample
+# Dashboard groups as segments: high = TotalScore >= 70, medium = 50-69, low < 50
+GROUP_SEGMENTS = {'high': list(SEGMENTS[3:]), 'medium': list(SEGMENTS[1:3]), 'low': list(SEGMENTS[:1])}
+RC_PARAMS = {'font.size': 10}
+
+
+@dataclass
+class ReportSummary:
+    # Every aggregate the two dashboards and the printed summary use, computed in
+    # one pass over the scored customers; panels only read from it
+    n: int
+    score_hist: Tuple[np.ndarray, np.ndarray]           # counts, edges (20 bins)
+    segment_counts: pd.Series
+    avg_scores: List[float]
+    scatter: Tuple[np.ndarray, np.ndarray]              # TotalScore, CLV
+    age_potential: pd.Series
+    education_potential: pd.Series
+    group_hists: Dict[str, Tuple[np.ndarray, np.ndarray]]  # high/medium/low, 15 bins each
+    group_sizes: Dict[str, int]
+    clv_means: List[float]
+    clv_stds: List[float]
+    score_matrix: pd.DataFrame
+    potential_counts: pd.Series
+    clv_mean_all: float
+
+
+def _counts(labels: pd.Series) -> pd.Series:
+    # value_counts with string labels and no empty categories, whether labels are objects or categorical
+    counts = labels.value_counts()
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(str)
+    return counts
+
+
+def summarize(df: pd.DataFrame, seed: int = 0, cube: Optional[SegmentCube] = None) -> ReportSummary:
+    # Group means/stds come from the segment cube (built here unless the caller
+    # already maintains one for df); only histograms and the sample need the rows
+    cube = cube or SegmentCube().update(df)
+    total = df['TotalScore'].to_numpy()
+    clv = df['CustomerLifetimeValue'].to_numpy()
+    groups = {'high': total >= 70, 'medium': (total >= 50) & (total < 70), 'low': total < 50}
+    group_stats = [cube.stats(Segment=segments).iloc[0] for segments in GROUP_SEGMENTS.values()]
+    overall = cube.stats().iloc[0]
+    if len(df) > SCATTER_MAX_POINTS:
+        idx = np.sort(np.random.default_rng(seed).choice(len(df), SCATTER_MAX_POINTS, replace=False))
+    else:
+        idx = slice(None)
+    education = cube.stats('EducationLevel')
+    return ReportSummary(
+        n=len(df),
+        score_hist=np.histogram(total, bins=20),
+        segment_counts=_counts(df['Segment']).sort_values(ascending=False, kind='stable'),
+        avg_scores=[overall[f'mean_{col}'] for col in SCORE_COMPONENTS],
+        scatter=(total[idx], clv[idx]),
+        age_potential=cube.stats('AgeBand', AgeBand=AGE_LABELS)['mean_TotalScore'],
+        education_potential=education.loc[education['count'] > 0, 'mean_TotalScore']
+        .sort_values(ascending=False),
+        group_hists={k: np.histogram(total[m], bins=15) for k, m in groups.items()},
+        group_sizes={k: int(g['count']) for k, g in zip(GROUP_SEGMENTS, group_stats)},
+        clv_means=[g['mean_CustomerLifetimeValue'] for g in group_stats],
+        clv_stds=[g['std_CustomerLifetimeValue'] for g in group_stats],
+        score_matrix=df[SCORE_COMPONENTS].corr(),
+        potential_counts=_counts(df['PotentialLevel']).sort_index(),
+        clv_mean_all=float(overall['mean_CustomerLifetimeValue']),
+    )
+
+
+def _hist(ax, counts_edges, **kw):
+    # Same bars as ax.hist(values, bins=...) from precomputed counts
+    counts, edges = counts_edges
+    return ax.hist(edges[:-1], bins=edges, weights=counts, **kw)
+
+
+def _label_bars(ax, bars, fmt: str, offset: Callable[[float], float]) -> None:
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + offset(height),
+                fmt.format(height), ha='center', va='bottom', fontweight='bold')
+
+
+# 1. High-Potential Customer Scoring Dashboard
+
+def panel_score_distribution(ax, s: ReportSummary) -> None:
+    _hist(ax, s.score_hist, color='#FF6B6B', alpha=0.7, edgecolor='black')
+    ax.axvline(x=70, color='red', linestyle='--', linewidth=2, label='Seuil Haut Potentiel (70+)')
+    ax.set_title('Distribution des Scores Totaux', fontweight='bold')
+    ax.set_xlabel('Score Total (0-100)')
+    ax.set_ylabel('Nombre de Clients')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def panel_segments(ax, s: ReportSummary) -> None:
+    colors = ['#2CA02C', '#FFD700', '#FF7F0E', '#D62728', '#9467BD']
+    wedges, texts, autotexts = ax.pie(s.segment_counts.values, labels=s.segment_counts.index,
+                                      autopct='%1.1f%%', colors=colors, startangle=90)
+    ax.set_title('Segmentation des Clients', fontweight='bold')
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+
+def panel_components(ax, s: ReportSummary) -> None:
+    bars = ax.bar(COMPONENT_NAMES, s.avg_scores, color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'])
+    ax.set_title('Scores Moyens par Composante', fontweight='bold')
+    ax.set_ylabel('Score Moyen (0-25)')
+    ax.set_ylim(0, 25)
+    _label_bars(ax, bars, '{:.1f}', lambda h: 0.5)
+
+
+def panel_clv_vs_score(ax, s: ReportSummary) -> None:
+    score, clv = s.scatter
+    scatter = ax.scatter(score, clv, c=score, cmap='viridis', alpha=0.6, s=30)
+    ax.set_title('Score Total vs CLV', fontweight='bold')
+    ax.set_xlabel('Score Total')
+    ax.set_ylabel('Customer Lifetime Value (TL)')
+    ax.grid(True, alpha=0.3)
+    ax.figure.colorbar(scatter, ax=ax, label='Score Total')
+
+
+def panel_age(ax, s: ReportSummary) -> None:
+    bars = ax.bar(s.age_potential.index, s.age_potential.values, color='#4ECDC4')
+    ax.set_title('Score de Potentiel par Groupe d\'Âge', fontweight='bold')
+    ax.set_xlabel('Groupe d\'Âge')
+    ax.set_ylabel('Score Moyen')
+    ax.set_ylim(0, 100)
+    _label_bars(ax, bars, '{:.1f}', lambda h: 1)
+
+
+def panel_education(ax, s: ReportSummary) -> None:
+    bars = ax.bar(s.education_potential.index.astype(str), s.education_potential.values, color='#45B7D1')
+    ax.set_title('Impact de l\'Éducation sur le Potentiel', fontweight='bold')
+    ax.set_xlabel('Niveau d\'Éducation')
+    ax.set_ylabel('Score Moyen')
+    ax.set_ylim(0, 100)
+    ax.tick_params(axis='x', rotation=45)
+    _label_bars(ax, bars, '{:.1f}', lambda h: 1)
+
+
+# 2. Detailed Score Analysis
+
+def panel_segment_distribution(ax, s: ReportSummary) -> None:
+    _hist(ax, s.group_hists['high'], alpha=0.7, label='Haut Potentiel (70+)', color='#2CA02C')
+    _hist(ax, s.group_hists['medium'], alpha=0.7, label='Potentiel Moyen (50-69)', color='#FFD700')
+    _hist(ax, s.group_hists['low'], alpha=0.7, label='Potentiel Standard (<50)', color='#D62728')
+    ax.set_title('Distribution des Scores par Segment', fontweight='bold')
+    ax.set_xlabel('Score Total')
+    ax.set_ylabel('Nombre de Clients')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def panel_clv_by_segment(ax, s: ReportSummary) -> None:
+    segments = ['Haut Potentiel', 'Potentiel Moyen', 'Potentiel Standard']
+    bars = ax.bar(segments, s.clv_means, yerr=s.clv_stds, capsize=5, color=['#2CA02C', '#FFD700', '#D62728'])
+    ax.set_title('CLV Moyen par Segment', fontweight='bold')
+    ax.set_ylabel('CLV Moyen (TL)')
+    _label_bars(ax, bars, '{:,.0f}', lambda h: h*0.01)
+
+
+def panel_component_correlation(ax, s: ReportSummary) -> None:
+    im = ax.imshow(s.score_matrix, cmap='YlOrRd', aspect='auto')
+    ax.set_title('Corrélation entre Composantes de Score', fontweight='bold')
+    ax.set_xticks(range(len(COMPONENT_NAMES)))
+    ax.set_yticks(range(len(COMPONENT_NAMES)))
+    ax.set_xticklabels(COMPONENT_NAMES, rotation=45)
+    ax.set_yticklabels(COMPONENT_NAMES)
+    for i in range(len(COMPONENT_NAMES)):
+        for j in range(len(COMPONENT_NAMES)):
+            ax.text(j, i, f'{s.score_matrix.iloc[i, j]:.2f}', ha='center', va='center', color='black',
+                    fontweight='bold')
+    ax.figure.colorbar(im, ax=ax, label='Corrélation')
+
+
+def panel_potential_levels(ax, s: ReportSummary) -> None:
+    colors = ['#D62728', '#FF7F0E', '#FFD700', '#2CA02C', '#1F77B4']
+    bars = ax.bar(s.potential_counts.index.astype(str), s.potential_counts.values, color=colors)
+    ax.set_title('Distribution par Niveau de Potentiel', fontweight='bold')
+    ax.set_xlabel('Niveau de Potentiel')
+    ax.set_ylabel('Nombre de Clients')
+    _label_bars(ax, bars, '{:,.0f}', lambda h: h*0.01)
+
+
+DASHBOARDS = {
+    'simple': {
+        'title': 'ISBANK - Identification des Clients à Fort Potentiel\n(Logique Excel + Python)',
+        'grid': (2, 3), 'figsize': (18, 12),
+        'panels': [panel_score_distribution, panel_segments, panel_components, panel_clv_vs_score, panel_age,
+                   panel_education],
+    },
+    'detailed': {
+        'title': 'Analyse Détaillée des Scores - Logique Excel',
+        'grid': (2, 2), 'figsize': (16, 12),
+        'panels': [panel_segment_distribution, panel_clv_by_segment, panel_component_correlation,
+                   panel_potential_levels],
+    },
+}
+# Output names used by isbank_simple_analysis.py
+DASHBOARD_FILES = {'simple': 'isbank_simple_analysis.png', 'detailed': 'isbank_detailed_analysis.png'}
+
+
+def draw_dashboard(fig, name: str, s: ReportSummary):
+    # All panels of one dashboard on a single figure (interactive use / one process)
+    spec = DASHBOARDS[name]
+    axes = fig.subplots(*spec['grid'])
+    fig.suptitle(spec['title'], fontsize=16, fontweight='bold')
+    for ax, panel in zip(axes.flat, spec['panels']):
+        panel(ax, s)
+    fig.tight_layout()
+    return axes
+
+
+def render_panel(name: str, index: int, s: ReportSummary, dpi: int) -> bytes:
+    # One panel at its grid-cell size on an Agg canvas (no pyplot state, no display)
+    import matplotlib
+    spec = DASHBOARDS[name]
+    rows, cols = spec['grid']
+    width, height = spec['figsize']
+    with matplotlib.rc_context(RC_PARAMS):
+        fig = Figure(figsize=(width / cols, (height - 0.8) / rows))
+        FigureCanvasAgg(fig)
+        spec['panels'][index](fig.add_subplot(), s)
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=dpi)
+    return buf.getvalue()
+
+
+def compose(name: str, panels: List[bytes], out_path: Path, dpi: int) -> Path:
+    # Place the rendered panels on the dashboard grid under the title
+    spec = DASHBOARDS[name]
+    rows, cols = spec['grid']
+    width, height = spec['figsize']
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    top = 1 - 0.8 / height
+    fig.suptitle(spec['title'], fontsize=16, fontweight='bold', y=1 - 0.1 / height, va='top')
+    for i, png in enumerate(panels):
+        r, c = divmod(i, cols)
+        ax = fig.add_axes([c / cols, top - (r + 1) * top / rows, 1 / cols, top / rows])
+        ax.imshow(imread(io.BytesIO(png)), interpolation='none')
+        ax.set_axis_off()
+    fig.savefig(out_path, dpi=dpi)
+    return out_path
+
+
+def render_reports(summaries: Dict[str, ReportSummary], out_dir: str = 'reports', dpi: int = 150,
+                   workers: Optional[int] = None) -> List[Path]:
+    # Panels of every report are rendered across worker processes, then each
+    # dashboard is composed once its panels are back
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(report, name, i) for report in summaries for name in DASHBOARDS
+            for i in range(len(DASHBOARDS[name]['panels']))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {job: pool.submit(render_panel, job[1], job[2], summaries[job[0]], dpi) for job in jobs}
+        composed = [
+            pool.submit(compose, name, [futures[(report, name, i)].result()
+                                        for i in range(len(DASHBOARDS[name]['panels']))],
+                        out_dir / f'{report}_{DASHBOARD_FILES[name]}', dpi)
+            for report in summaries for name in DASHBOARDS
+        ]
+        return [f.result() for f in composed]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Render ISBANK dashboards headless, one report per branch')
+    parser.add_argument('--branches', type=int, default=0,
+                        help='split a generated portfolio into this many branch reports (0: the 1,000-customer set)')
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--out', default='reports')
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.branches:
+        df = score_customers(generate_customers(args.customers, seed=0), categorical=True)
+        branch = np.random.default_rng(1).integers(0, args.branches, size=len(df))
+        summaries = {f'agence_{b:02d}': summarize(part) for b, part in df.groupby(branch)}
+    else:
+        summaries = {'portefeuille': summarize(score_customers(legacy_customers()))}
+    t1 = time.perf_counter()
+    paths = render_reports(summaries, args.out, dpi=args.dpi, workers=args.workers)
+    t2 = time.perf_counter()
+    print(f'✅ {len(paths)} tableaux de bord ({len(summaries)} rapports) dans {args.out}/')
+    print(f' - Agrégats: {t1 - t0:.1f}s, rendu: {t2 - t1:.1f}s sur {args.workers or os.cpu_count()} processus')
+
+
+if __name__ == '__main__':
+    main()
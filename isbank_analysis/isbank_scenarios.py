@@ -0,0 +1,204 @@
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scoring_engine import SEGMENTS, generate_customers, missing_amounts, score_arrays
+
+BATCH_ROWS = 250_000
+TASK_SCENARIOS = 8  # scenarios per pool task, to amortize the round trip
+PORTFOLIO_COLUMNS = ['Income', 'CurrentBalance', 'EducationLevel', 'MonthlyTransactions', 'InvestmentAmount']
+RESULT_COLUMNS = ['scenario', 'income_shock', 'balance_shock', 'clv_total', 'score_mean'] + SEGMENTS
+
+
+@dataclass
+class ShockModel:
+    # Log-normal shocks over the horizon: a portfolio-wide (macro) shock drawn once
+    # per scenario, correlated between income and balance, plus a per-customer one
+    horizon_years: float = 1.0
+    income_drift: float = 0.03   # yearly mean log-change
+    income_vol: float = 0.08     # yearly macro volatility
+    balance_drift: float = 0.05
+    balance_vol: float = 0.15
+    correlation: float = 0.6     # between the income and balance macro shocks
+    customer_vol: float = 0.10   # yearly idiosyncratic volatility, both variables
+
+
+@dataclass
+class Portfolio:
+    # Scoring inputs as arrays; income and balance are the ones the scenarios move
+    income: np.ndarray
+    balance: np.ndarray
+    education: pd.Series
+    transactions: np.ndarray
+    investment: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Portfolio':
+        bad = missing_amounts(df)
+        if bad.any():
+            raise ValueError(f'{int(bad.sum()):,} customers with a missing amount; clean the portfolio first')
+        education = df['EducationLevel'].reset_index(drop=True)
+        if not isinstance(education.dtype, pd.CategoricalDtype):
+            education = education.astype('category')
+        return cls(df['Income'].to_numpy(dtype=float), df['CurrentBalance'].to_numpy(dtype=float), education,
+                   df['MonthlyTransactions'].to_numpy(dtype=float), df['InvestmentAmount'].to_numpy(dtype=float))
+
+    def __len__(self) -> int:
+        return len(self.income)
+
+
+def load_portfolio(path: Optional[str] = None, customers: int = 100_000, seed: int = 0) -> Portfolio:
+    # A customer file (CSV/Parquet, as batch_scoring.py reads) or a generated portfolio.
+    # Every worker holds the whole portfolio in memory: about 40 bytes per customer
+    # (four float64 columns and the education codes), i.e. ~400 MB per worker for
+    # 10M customers; for larger files, lower --workers. Only the scoring columns of
+    # each chunk are kept while reading.
+    if path:
+        from batch_scoring import iter_chunks
+        return Portfolio.from_frame(pd.concat((c[PORTFOLIO_COLUMNS] for c in iter_chunks(Path(path))),
+                                              ignore_index=True))
+    return Portfolio.from_frame(generate_customers(customers, seed=seed))
+
+
+def scenario_rngs(seed: int, scenario: int) -> List[np.random.Generator]:
+    # Child `scenario` of SeedSequence(seed) (the same stream whichever worker runs
+    # it and however many scenarios there are), split into macro, income and
+    # balance streams so the per-customer draws do not depend on the batch size
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed, spawn_key=(scenario,)).spawn(3)]
+
+
+def score_batch(portfolio: Portfolio, rows: slice, income_factor, balance_factor) -> Dict[str, np.ndarray]:
+    return score_arrays(portfolio.income[rows] * income_factor, portfolio.balance[rows] * balance_factor,
+                        portfolio.education.iloc[rows], portfolio.transactions[rows], portfolio.investment[rows],
+                        categorical=True)
+
+
+def _totals(portfolio: Portfolio, batch_rows: int, factors: Callable[[int], tuple]) -> Dict:
+    # Re-scores the portfolio batch by batch with the (income, balance) factors of
+    # each batch and keeps only the aggregates, so memory is one batch of
+    # temporaries whatever the portfolio size
+    counts = np.zeros(len(SEGMENTS), dtype=np.int64)
+    clv_total, score_total = 0.0, 0
+    for start in range(0, len(portfolio), batch_rows):
+        rows = slice(start, min(start + batch_rows, len(portfolio)))
+        scores = score_batch(portfolio, rows, *factors(rows.stop - rows.start))
+        counts += np.bincount(scores['Segment'].codes, minlength=len(SEGMENTS))
+        clv_total += float(scores['CustomerLifetimeValue'].sum())
+        score_total += int(scores['TotalScore'].sum())
+    return {'clv_total': clv_total, 'score_mean': score_total / max(len(portfolio), 1),
+            **dict(zip(SEGMENTS, counts.tolist()))}
+
+
+def simulate_scenario(portfolio: Portfolio, scenario: int, seed: int, model: ShockModel,
+                      batch_rows: int = BATCH_ROWS) -> Dict:
+    macro_rng, income_rng, balance_rng = scenario_rngs(seed, scenario)
+    t = model.horizon_years
+    z_income, z_other = macro_rng.standard_normal(2)
+    z_balance = model.correlation * z_income + np.sqrt(1 - model.correlation ** 2) * z_other
+    income_shock = model.income_drift * t + model.income_vol * np.sqrt(t) * z_income
+    balance_shock = model.balance_drift * t + model.balance_vol * np.sqrt(t) * z_balance
+    customer_sd = model.customer_vol * np.sqrt(t)
+
+    def factors(n: int) -> tuple:
+        return (np.exp(income_shock + customer_sd * income_rng.standard_normal(n)),
+                np.exp(balance_shock + customer_sd * balance_rng.standard_normal(n)))
+
+    return {'scenario': scenario, 'income_shock': float(income_shock), 'balance_shock': float(balance_shock),
+            **_totals(portfolio, batch_rows, factors)}
+
+
+def baseline(portfolio: Portfolio, batch_rows: int = BATCH_ROWS) -> Dict:
+    # The unshocked portfolio, in the same format as a scenario result
+    return {'scenario': -1, 'income_shock': 0.0, 'balance_shock': 0.0,
+            **_totals(portfolio, batch_rows, lambda n: (1.0, 1.0))}
+
+
+_PORTFOLIO: Optional[Portfolio] = None
+
+
+def _init_worker(path: Optional[str], customers: int, portfolio_seed: int) -> None:
+    # Each worker builds the base portfolio once and reuses it for all its scenarios
+    global _PORTFOLIO
+    _PORTFOLIO = load_portfolio(path, customers, portfolio_seed)
+
+
+def _run_task(scenarios: range, seed: int, model: ShockModel, batch_rows: int) -> List[Dict]:
+    return [simulate_scenario(_PORTFOLIO, i, seed, model, batch_rows) for i in scenarios]
+
+
+def run_scenarios(n_scenarios: int, seed: int = 0, model: Optional[ShockModel] = None,
+                  portfolio_path: Optional[str] = None, customers: int = 100_000, portfolio_seed: int = 0,
+                  workers: Optional[int] = None, batch_rows: int = BATCH_ROWS) -> Iterator[Dict]:
+    # Scenario results in scenario order, as they complete; at most 2 × workers
+    # tasks are in flight, so neither the queue nor the results grow with n_scenarios
+    model = model or ShockModel()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(portfolio_path, customers, portfolio_seed)) as pool:
+        pending = deque()
+        for start in range(0, n_scenarios, TASK_SCENARIOS):
+            task = range(start, min(start + TASK_SCENARIOS, n_scenarios))
+            pending.append(pool.submit(_run_task, task, seed, model, batch_rows))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Monte-Carlo income/balance scenarios on the ISBANK portfolio')
+    parser.add_argument('--scenarios', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help='root seed; scenario i uses its i-th child')
+    parser.add_argument('--portfolio', help='customer file (CSV/Parquet); default: a generated portfolio')
+    parser.add_argument('--customers', type=int, default=100_000, help='size of the generated portfolio')
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    parser.add_argument('--out', default='reports/scenarios.csv')
+    args = parser.parse_args()
+    if args.scenarios < 0:
+        parser.error('--scenarios must be >= 0')
+
+    model = ShockModel(horizon_years=args.years)
+    base = baseline(load_portfolio(args.portfolio, args.customers), args.batch_rows)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    clv_totals = np.empty(args.scenarios)
+    segment_sums = np.zeros(len(SEGMENTS))
+    with open(out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerow(base)
+        for result in run_scenarios(args.scenarios, args.seed, model, args.portfolio, args.customers,
+                                    workers=args.workers, batch_rows=args.batch_rows):
+            writer.writerow(result)
+            clv_totals[result['scenario']] = result['clv_total']
+            segment_sums += [result[s] for s in SEGMENTS]
+    elapsed = time.perf_counter() - t0
+
+    n = sum(base[s] for s in SEGMENTS)
+    print(f'✅ {args.scenarios:,} scénarios sur {n:,} clients en {elapsed:.1f}s: {out}')
+    print(f" - Modèle: {asdict(model)}")
+    print(f" - CLV total de base: {base['clv_total']:,.0f} TL")
+    if args.scenarios == 0 or n == 0:
+        return
+    p5, p50, p95 = np.percentile(clv_totals, [5, 50, 95])
+    print(f' - CLV total simulé: P5 {p5:,.0f} / P50 {p50:,.0f} / P95 {p95:,.0f} TL')
+    print(' - Répartition des segments (base → moyenne simulée):')
+    for segment, total in zip(SEGMENTS, segment_sums):
+        print(f'   • {segment}: {base[segment] / n:.1%} → {total / args.scenarios / n:.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from scoring_engine import (ACTIVITY_TIERS, BALANCE_TIERS, BATCH_MIN, CLV_SCORE_MULTIPLIER, CLV_WEIGHTS,
+                            EDUCATION_DEFAULT, EDUCATION_SCORES, INCOME_TIERS, POTENTIAL_LEVELS, SEGMENT_CUTOFFS,
+                            SEGMENTS, generate_customers, numeric_field)
+
+try:
+    import yaml
+    HAVE_YAML = True
+except Exception:
+    HAVE_YAML = False
+
+
+def default_rules() -> Dict:
+    # The rules hard-coded in scoring_engine, in the rule-file format (rules/isbank_v1.json)
+    def tiers(name: str, column: str, table) -> Dict:
+        return {'name': name, 'column': column, 'thresholds': list(table[0]), 'points': list(table[1])}
+
+    return {
+        'version': 'v1',
+        'components': [
+            tiers('IncomeScore', 'Income', INCOME_TIERS),
+            tiers('BalanceScore', 'CurrentBalance', BALANCE_TIERS),
+            {'name': 'EducationScore', 'column': 'EducationLevel', 'categories': dict(EDUCATION_SCORES),
+             'default': EDUCATION_DEFAULT},
+            tiers('ActivityScore', 'MonthlyTransactions', ACTIVITY_TIERS),
+        ],
+        'segments': {'cutoffs': list(SEGMENT_CUTOFFS), 'labels': list(SEGMENTS), 'levels': list(POTENTIAL_LEVELS)},
+        'clv': {'weights': dict(zip(['Income', 'CurrentBalance', 'InvestmentAmount'], CLV_WEIGHTS)),
+                'score_multiplier': CLV_SCORE_MULTIPLIER},
+    }
+
+
+def load_rules(path: Union[str, Path]) -> Dict:
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        if not HAVE_YAML:
+            raise RuntimeError('PyYAML is required for YAML rule files')
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+class RuleSet:
+    # A rule definition compiled once into arrays: threshold vectors for tiered
+    # components, a category → points table for categorical ones, and a segment
+    # lookup indexed directly by TotalScore (scores are integers with a known range).
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.version = str(spec.get('version', 'unversioned'))
+        self.components = []
+        for comp in spec['components']:
+            if 'thresholds' in comp:
+                thresholds = np.asarray(comp['thresholds'], dtype=float)
+                points = np.asarray(comp['points'], dtype=np.int64)
+                if len(points) != len(thresholds) + 1:
+                    raise ValueError(f"{comp['name']}: needs len(thresholds) + 1 points")
+                if np.any(np.diff(thresholds) <= 0):
+                    raise ValueError(f"{comp['name']}: thresholds must be strictly increasing")
+                # Arrays for the vectorized path, lists for bisect in single-customer scoring
+                self.components.append(('tiers', comp['name'], comp['column'], thresholds, points,
+                                        thresholds.tolist(), points.tolist()))
+            else:
+                categories = {k: int(v) for k, v in comp['categories'].items()}
+                self.components.append(('categories', comp['name'], comp['column'], categories,
+                                        int(comp.get('default', 0))))
+
+        seg = spec['segments']
+        cutoffs = [int(c) for c in seg['cutoffs']]
+        if any(b <= a for a, b in zip(cutoffs, cutoffs[1:])):
+            raise ValueError('segments: cutoffs must be strictly increasing')
+        if len(seg['labels']) != len(cutoffs) + 1 or len(seg['levels']) != len(cutoffs) + 1:
+            raise ValueError('segments: needs len(cutoffs) + 1 labels and levels')
+        self.labels = list(seg['labels'])
+        self.levels = list(seg['levels'])
+        lows, highs = zip(*(self._points_range(c) for c in self.components))
+        self.min_total, max_total = sum(lows), sum(highs)
+        totals = np.arange(self.min_total, max_total + 1)
+        self.segment_lut = np.searchsorted(cutoffs, totals, side='right').astype(np.int8)
+        self._segment_tiers = self.segment_lut.tolist()
+
+        clv = spec['clv']
+        self.clv_weights = [(col, float(w)) for col, w in clv['weights'].items()]
+        self.score_multiplier = float(clv['score_multiplier'])
+        self.columns = sorted({c[2] for c in self.components} | {col for col, _ in self.clv_weights})
+        self.numeric_columns = sorted({c[2] for c in self.components if c[0] == 'tiers'} |
+                                      {col for col, _ in self.clv_weights})
+
+    @staticmethod
+    def _points_range(comp) -> Sequence[int]:
+        if comp[0] == 'tiers':
+            return int(comp[4].min()), int(comp[4].max())
+        values = list(comp[3].values()) + [comp[4]]
+        return min(values), max(values)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'RuleSet':
+        return cls(load_rules(path))
+
+    def score_arrays(self, inputs: 'Inputs', categorical: bool = False) -> Dict[str, np.ndarray]:
+        # Missing amounts raise here, as in scoring_engine.score_customers
+        for column in self.numeric_columns:
+            missing = int(np.isnan(inputs.numeric(column)).sum())
+            if missing:
+                raise ValueError(f'{missing:,} customers with a missing {column}')
+        out = {}
+        total = np.zeros(inputs.n, dtype=np.int64)
+        for comp in self.components:
+            if comp[0] == 'tiers':
+                _, name, column, thresholds, points = comp[:5]
+                values = inputs.numeric(column)
+                idx = np.zeros(inputs.n, dtype=np.intp)
+                for threshold in thresholds:
+                    idx += values > threshold
+                score = points[idx]
+            else:
+                _, name, column, categories, default = comp
+                codes, uniques = inputs.codes(column)
+                table = np.array([categories.get(u, default) for u in uniques] + [default], dtype=np.int64)
+                score = table[codes]
+            out[name] = score
+            total += score
+        out['TotalScore'] = total
+        tier = self.segment_lut[total - self.min_total]
+        if categorical:
+            out['Segment'] = pd.Categorical.from_codes(tier, self.labels)
+            out['PotentialLevel'] = pd.Categorical.from_codes(tier, self.levels)
+        else:
+            out['Segment'] = np.asarray(self.labels, dtype=object)[tier]
+            out['PotentialLevel'] = np.asarray(self.levels, dtype=object)[tier]
+        base_clv = None
+        for column, weight in self.clv_weights:
+            term = inputs.numeric(column) * weight
+            base_clv = term if base_clv is None else base_clv + term
+        out['CustomerLifetimeValue'] = base_clv * (1 + (total / 100) * self.score_multiplier)
+        return out
+
+    def score_customers(self, df: pd.DataFrame, categorical: bool = False) -> pd.DataFrame:
+        return df.assign(**self.score_arrays(Inputs(df), categorical=categorical))
+
+    # Same interface as scoring_service.CompiledRules, so a rule set can be served
+    def score(self, customer: Dict) -> Dict:
+        result, total = {}, 0
+        for comp in self.components:
+            if comp[0] == 'tiers':
+                _, name, column, _, _, thresholds, points = comp
+                score = points[bisect_left(thresholds, numeric_field(customer, column))]
+            else:
+                _, name, column, categories, default = comp
+                score = categories.get(customer.get(column), default)
+            result[name] = score
+            total += score
+        tier = self._segment_tiers[total - self.min_total]
+        base_clv = None
+        for column, weight in self.clv_weights:
+            term = numeric_field(customer, column) * weight
+            base_clv = term if base_clv is None else base_clv + term
+        result.update({'TotalScore': total, 'Segment': self.labels[tier], 'PotentialLevel': self.levels[tier],
+                       'CustomerLifetimeValue': base_clv * (1 + (total / 100) * self.score_multiplier)})
+        return result
+
+    def score_many(self, customers: List[Dict]) -> List[Dict]:
+        if len(customers) < BATCH_MIN:
+            return [self.score(c) for c in customers]
+        scores = self.score_arrays(Inputs(pd.DataFrame(customers)))
+        names = list(scores)
+        return [dict(zip(names, values)) for values in zip(*(scores[k].tolist() for k in names))]
+
+
+class Inputs:
+    # Column conversions shared by every rule set scored over the same population:
+    # each column is cast to float (or factorized) once, however many versions use it
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, tuple] = {}
+
+    def numeric(self, column: str) -> np.ndarray:
+        if column not in self._numeric:
+            self._numeric[column] = self.df[column].to_numpy(dtype=float)
+        return self._numeric[column]
+
+    def codes(self, column: str) -> tuple:
+        if column not in self._codes:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                self._codes[column] = (values.cat.codes.to_numpy(), list(values.cat.categories))
+            else:
+                codes, uniques = pd.factorize(values)
+                self._codes[column] = (codes, list(uniques))
+        return self._codes[column]
+
+
+def score_versions(df: pd.DataFrame, rulesets: List[RuleSet], categorical: bool = True) -> pd.DataFrame:
+    # One pass over the population for several rule versions (A/B): columns are
+    # (version, field), e.g. scored['v2', 'Segment']
+    inputs = Inputs(df)
+    frames = {rs.version: pd.DataFrame(rs.score_arrays(inputs, categorical=categorical), index=df.index)
+              for rs in rulesets}
+    return pd.concat(frames, axis=1)
+
+
+def compare_versions(scored: pd.DataFrame, base: str, challenger: str) -> Dict[str, pd.DataFrame]:
+    # Segment migration matrix and per-version totals for an A/B pair from score_versions
+    migration = pd.crosstab(scored[base, 'Segment'], scored[challenger, 'Segment'],
+                            rownames=[base], colnames=[challenger])
+    totals = pd.DataFrame({
+        v: {'clients': len(scored), 'clv_total': scored[v, 'CustomerLifetimeValue'].sum(),
+            'score_moyen': scored[v, 'TotalScore'].mean()}
+        for v in (base, challenger)
+    }).T
+    return {'migration': migration, 'totals': totals}
+
+
+class HotRules:
+    # Rule file reloaded when its modification time changes (checked at most every
+    # check_s seconds). The compiled rule set is swapped in one assignment, so
+    # scoring threads always see a complete version; a file that fails to compile
+    # is reported and the previous version stays active.
+    def __init__(self, path: Union[str, Path], check_s: float = 1.0):
+        self.path = Path(path)
+        self.check_s = check_s
+        self._lock = threading.Lock()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._checked = time.monotonic()
+        self.rules = RuleSet.from_file(self.path)
+
+    def current(self) -> RuleSet:
+        now = time.monotonic()
+        if now - self._checked >= self.check_s and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    try:
+                        self.rules = RuleSet.from_file(self.path)
+                        print(f'Règles rechargées: {self.path.name} (version {self.rules.version})')
+                    except Exception as exc:  # noqa: BLE001
+                        print(f'⚠️ Règles {self.path.name} ignorées, version {self.rules.version} conservée: {exc}')
+            finally:
+                self._lock.release()
+        return self.rules
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def score(self, customer: Dict) -> Dict:
+        return self.current().score(customer)
+
+    def score_many(self, customers: List[Dict]) -> List[Dict]:
+        return self.current().score_many(customers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='A/B comparison of ISBANK rule versions on one population')
+    parser.add_argument('rules', nargs='+', help='rule files (JSON or YAML); the first one is the baseline')
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rulesets = [RuleSet.from_file(p) for p in args.rules]
+    df = generate_customers(args.customers, seed=args.seed)
+    t0 = time.perf_counter()
+    scored = score_versions(df, rulesets)
+    elapsed = time.perf_counter() - t0
+    print(f'✅ {len(df):,} clients notés sous {len(rulesets)} versions en {elapsed:.2f}s')
+    base = rulesets[0].version
+    for rs in rulesets[1:]:
+        comparison = compare_versions(scored, base, rs.version)
+        print(f'\n📊 {base} → {rs.version}')
+        print(comparison['totals'].round(1).to_string())
+        print(comparison['migration'].to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import numpy as np
+
+from scoring_engine import (ACTIVITY_TIERS, AMOUNT_COLUMNS, BALANCE_TIERS, BATCH_MIN, CLV_SCORE_MULTIPLIER,
+                            CLV_WEIGHTS, EDUCATION_DEFAULT, EDUCATION_SCORES, INCOME_TIERS, POTENTIAL_LEVELS,
+                            SEGMENT_CUTOFFS, SEGMENTS, numeric_field, score_arrays)
+
+RESULT_FIELDS = ['IncomeScore', 'BalanceScore', 'EducationScore', 'ActivityScore', 'TotalScore', 'Segment',
+                 'PotentialLevel', 'CustomerLifetimeValue']
+
+
+class CompiledRules:
+    # The scoring_engine tables frozen into tuples for per-customer scoring:
+    # bisect_left counts the thresholds a value is strictly above, bisect_right the
+    # cut-offs a score reaches, which is what the vectorized engine computes.
+    version = 'v1'  # the rules of scoring_engine, as in rules/isbank_v1.json
+
+    def __init__(self):
+        self.income = (tuple(float(t) for t in INCOME_TIERS[0]), tuple(INCOME_TIERS[1]))
+        self.balance = (tuple(float(t) for t in BALANCE_TIERS[0]), tuple(BALANCE_TIERS[1]))
+        self.activity = (tuple(float(t) for t in ACTIVITY_TIERS[0]), tuple(ACTIVITY_TIERS[1]))
+        self.education = dict(EDUCATION_SCORES)
+        self.cutoffs = tuple(SEGMENT_CUTOFFS)
+        self.w_income, self.w_balance, self.w_investment = CLV_WEIGHTS
+
+    def score(self, customer: Dict) -> Dict:
+        income = numeric_field(customer, 'Income')
+        balance = numeric_field(customer, 'CurrentBalance')
+        investment = numeric_field(customer, 'InvestmentAmount')
+        transactions = numeric_field(customer, 'MonthlyTransactions')
+        income_score = self.income[1][bisect_left(self.income[0], income)]
+        balance_score = self.balance[1][bisect_left(self.balance[0], balance)]
+        education_score = self.education.get(customer.get('EducationLevel'), EDUCATION_DEFAULT)
+        activity_score = self.activity[1][bisect_left(self.activity[0], transactions)]
+        total_score = income_score + balance_score + education_score + activity_score
+        tier = bisect_right(self.cutoffs, total_score)
+        base_clv = (income * self.w_income) + (balance * self.w_balance) + (investment * self.w_investment)
+        return {
+            'IncomeScore': income_score,
+            'BalanceScore': balance_score,
+            'EducationScore': education_score,
+            'ActivityScore': activity_score,
+            'TotalScore': total_score,
+            'Segment': SEGMENTS[tier],
+            'PotentialLevel': POTENTIAL_LEVELS[tier],
+            'CustomerLifetimeValue': base_clv * (1 + (total_score / 100) * CLV_SCORE_MULTIPLIER),
+        }
+
+    def score_many(self, customers: List[Dict]) -> List[Dict]:
+        if len(customers) < BATCH_MIN:
+            return [self.score(c) for c in customers]
+        cols = {k: np.asarray([c[k] for c in customers], dtype=float) for k in AMOUNT_COLUMNS}
+        for k, values in cols.items():
+            bad = np.flatnonzero(np.isnan(values))
+            if len(bad):
+                numeric_field(customers[bad[0]], k)  # raises, as score() would for that customer
+        scores = score_arrays(cols['Income'], cols['CurrentBalance'], [c.get('EducationLevel') for c in customers],
+                              cols['MonthlyTransactions'], cols['InvestmentAmount'])
+        columns = [scores[f].tolist() for f in RESULT_FIELDS]
+        return [dict(zip(RESULT_FIELDS, values)) for values in zip(*columns)]
+
+
+RULES = CompiledRules()
+
+
+def score_customer(customer: Dict) -> Dict:
+    # In-process scoring of one customer, same result as scoring_engine.score_customers
+    return RULES.score(customer)
+
+
+class MicroBatcher:
+    # Requests that arrive while a batch is being scored are answered together by
+    # the next one; an idle service scores each request as soon as it arrives.
+    # `rules` is anything with score/score_many: CompiledRules, a
+    # scoring_rules.RuleSet, or a HotRules file that is reloaded when edited.
+    def __init__(self, rules=RULES, max_batch: int = 1024):
+        self.rules = rules
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, customer: Dict) -> Future:
+        fut: Future = Future()
+        self._queue.put((customer, fut))
+        return fut
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self.rules.score_many([c for c, _ in batch])
+            except Exception:
+                # One bad request must not fail the rest of the batch: retry one by one
+                for customer, fut in batch:
+                    try:
+                        fut.set_result(self.rules.score(customer))
+                    except Exception as exc:  # noqa: BLE001
+                        fut.set_exception(exc)
+                continue
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+
+def make_handler(batcher: MicroBatcher, timeout: float = 5.0):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._reply(200, {'status': 'ok', 'rules_version': batcher.rules.version})
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            # {"Income": ..., ...} → one result; {"customers": [...]} → {"results": [...]}
+            if self.path != '/score':
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                if 'customers' in req:
+                    futures = [batcher.submit(c) for c in req['customers']]
+                    payload = {'results': [f.result(timeout=timeout) for f in futures]}
+                else:
+                    payload = batcher.submit(req).result(timeout=timeout)
+                    if 'CustomerID' in req:
+                        payload = {'CustomerID': req['CustomerID'], **payload}
+            except KeyError as exc:
+                self._reply(400, {'error': f'missing field {exc}'})
+                return
+            except Exception as exc:  # noqa: BLE001
+                self._reply(400, {'error': str(exc)})
+                return
+            self._reply(200, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve single-customer ISBANK scores over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rules', help='rule file (JSON/YAML, see scoring_rules.py), reloaded when it changes')
+    args = parser.parse_args()
+
+    # Timing of the in-process path on a typical customer
+    sample = {'Income': 85000, 'EducationLevel': 'Master', 'CurrentBalance': 150000, 'MonthlyTransactions': 35,
+              'InvestmentAmount': 25000}
+    n, t0 = 100_000, time.perf_counter()
+    for _ in range(n):
+        score_customer(sample)
+    print(f'Scoring in-process: {(time.perf_counter() - t0) / n * 1e6:.1f} µs par client')
+
+    rules = RULES
+    if args.rules:
+        from scoring_rules import HotRules
+        rules = HotRules(args.rules)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(MicroBatcher(rules)))
+    print(f'Serving ISBANK scores (rules {rules.version}) on http://{args.host}:{args.port}/score')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()